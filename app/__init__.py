@@ -6,6 +6,8 @@ from config import Config
 from dotenv import load_dotenv
 from .models import db, User, Friend
 from flask_wtf.csrf import CSRFProtect, generate_csrf
+from .utils import catalog, spotify_auth
+from .cli import catalog_cli
 
 # Import all blueprints
 from .routes.auth import auth_bp
@@ -44,6 +46,10 @@ def create_app(config_class=Config):
     db.init_app(app)
     Migrate(app, db)
 
+    catalog.init_app(app)  # the track catalog itself loads lazily on first use
+    app.cli.add_command(catalog_cli)
+    spotify_auth.init_app(app)
+
     login_manager.init_app(app)
     login_manager.login_view = 'auth.login'
 
@@ -0,0 +1,19 @@
+import time
+import click
+from flask import current_app
+from flask.cli import AppGroup
+from app.utils.catalog import compile_catalog
+
+catalog_cli = AppGroup('catalog', help='Manage the local track catalog.')
+
+# ---------- flask catalog compile ----------
+@catalog_cli.command('compile')
+@click.option('--source', help='CSV to read (defaults to CATALOG_CSV_PATH).')
+@click.option('--output', help='File to write (defaults to CATALOG_COMPILED_PATH).')
+def compile_command(source, output):
+    """Compile spotify.csv into the memory-mapped catalog format."""
+    source = source or current_app.config['CATALOG_CSV_PATH']
+    output = output or current_app.config['CATALOG_COMPILED_PATH']
+    start = time.perf_counter()
+    rows = compile_catalog(source, output)
+    click.echo(f"Compiled {rows} tracks from {source} into {output} in {time.perf_counter() - start:.1f}s")
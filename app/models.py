@@ -176,10 +176,14 @@ class Friend(db.Model):
 # ------------------ Playlist Model ------------------
 class Playlist(db.Model):
     __tablename__ = "playlists"
+    # Never reuse the id of a deleted playlist, so (id, version) stays unique
+    __table_args__ = {"sqlite_autoincrement": True}
 
     id: so.Mapped[int] = so.mapped_column(primary_key=True)
     name: so.Mapped[str] = so.mapped_column(sa.String(100), nullable=False)
-    owner_id: so.Mapped[int] = so.mapped_column(sa.ForeignKey("users.id"), nullable=False)
+    owner_id: so.Mapped[int] = so.mapped_column(sa.ForeignKey("users.id"), index=True, nullable=False)
+    # Incremented whenever the name or tracks change; the API serves it as an ETag
+    version: so.Mapped[int] = so.mapped_column(sa.Integer, default=1, server_default="1", nullable=False)
 
     owner: so.Mapped["User"] = so.relationship(back_populates="playlists")
     shares: so.Mapped[List["Share"]] = so.relationship(back_populates="playlist", cascade="all, delete")
@@ -213,6 +217,9 @@ class PlaylistTrack(db.Model):
 # ------------------ Track Model ------------------
 class Track(db.Model):
     __tablename__ = "tracks"
+    __table_args__ = (
+        sa.Index("ix_tracks_title_artist", "title", "artist", unique=True),
+    )
 
     id: so.Mapped[int] = so.mapped_column(primary_key=True)
     title: so.Mapped[str] = so.mapped_column(sa.String(100))
@@ -6,8 +6,17 @@ from flask import (
 from flask_login import current_user, login_required
 from flask_wtf.csrf import generate_csrf
 from app.models import db, Track, UserTrack, Playlist, PlaylistTrack
-from app.utils.spotify_auth import search_tracks
-from app.utils.track_feature_loader import get_track_features_by_id
+from app.utils.spotify_auth import (
+    search_tracks, search_cache, search_cache_key, search_flight, enrichment_cache, response_cache,
+    spotify_breaker
+)
+from app.utils.catalog import get_catalog, normalize_str
+from app.utils.recommender import recommend
+from app.utils.track_store import (
+    add_user_tracks, bump_playlist_version, delete_playlist_tracks, find_tracks_by_id, get_or_create_track,
+    get_or_create_tracks, insert_playlist_tracks, parse_track, playlist_track_ids
+)
+from app.utils.track_feature_loader import get_track_features_by_ids
 
 # Enable detailed debug logging
 import logging
@@ -16,6 +25,42 @@ logger = logging.getLogger(__name__)
 
 upload_bp = Blueprint('upload', __name__)
 
+# Upper bound on additions plus removals in one tracks:batch request
+MAX_BATCH_TRACKS = 1000
+
+# Default and maximum page sizes for the paginated playlist listings
+PAGE_SIZE = 500
+MAX_PAGE_SIZE = 1000
+
+
+def page_args():
+    """
+    (limit, after_id) from the ?limit= and ?cursor= arguments, where the
+    cursor is the next_cursor of the previous page; None if it is malformed.
+    """
+    limit = min(max(request.args.get("limit", PAGE_SIZE, type=int), 1), MAX_PAGE_SIZE)
+    cursor = request.args.get("cursor")
+    if cursor is None or cursor == "":
+        return limit, None
+    # isdigit() alone also accepts non-ASCII digits such as "²" that int() rejects
+    if not (cursor.isascii() and cursor.isdigit()):
+        return None
+    return limit, int(cursor)
+
+
+def keyset_page(query, key, limit, after=None):
+    """
+    (rows, next_cursor) for the rows of query with key > after, in key
+    order. Seeking past the previous page's last key keeps every page as
+    cheap as the first, unlike OFFSET.
+    """
+    if after is not None:
+        query = query.filter(key > after)
+    # Select the key alongside each row so the cursor always comes from it
+    rows = query.add_columns(key).order_by(key).limit(limit + 1).all()
+    next_cursor = str(rows[limit - 1][1]) if len(rows) > limit else None
+    return [row for row, _ in rows[:limit]], next_cursor
+
 # ---------- Main Upload Page ----------
 @upload_bp.route('/upload', methods=['GET'])
 @login_required
@@ -35,13 +80,23 @@ def api_search_tracks():
     query = request.args.get("query")
     if not query:
         return jsonify([])
+    limit = min(max(request.args.get("limit", 10, type=int), 1), 50)
 
-    results = search_tracks(query)
+    # The editor modal re-sends the same queries as the user types
+    key = search_cache_key(query, limit)
+    cached = search_cache.get(key)
+    if cached is not None:
+        response = jsonify(cached)
+        response.headers["X-Cache"] = "HIT"
+        return response
+
+    results = search_tracks(query, limit=limit)
+    # One catalog pass for every result instead of one lookup per track
+    catalog_rows, _ = get_track_features_by_ids(track.get("id") for track in results)
     enriched_results = []
 
     for track in results:
-        track_id = track.get("id")
-        enriched = get_track_features_by_id(track_id)
+        enriched = catalog_rows.get(track.get("id"))
 
         if enriched:
             # Merge Spotify API and CSV metadata
@@ -59,7 +114,85 @@ def api_search_tracks():
 
         enriched_results.append(track)
 
-    return jsonify(enriched_results)
+    # Results cut short by the enrichment deadline or served from the offline
+    # fallback are worth retrying
+    if not any(track.get("partial") or track.get("offline") for track in enriched_results):
+        search_cache.set(key, enriched_results)
+    response = jsonify(enriched_results)
+    response.headers["X-Cache"] = "MISS"
+    return response
+
+
+# ---------- Typeahead (local catalog, no Spotify) ----------
+@upload_bp.route("/api/typeahead")
+@login_required
+def api_typeahead():
+    prefix = normalize_str(request.args.get("q", ""))
+    if not prefix:
+        return jsonify([])
+    k = min(max(request.args.get("k", 8, type=int), 1), 20)
+
+    completions = get_catalog().typeahead_index.complete(prefix, k)
+    return jsonify([{"text": label, "type": kind} for label, kind in completions])
+
+
+# ---------- Similar Tracks (audio-feature nearest neighbours) ----------
+@upload_bp.route("/api/tracks/<track_id>/similar")
+@login_required
+def api_similar_tracks(track_id):
+    k = min(max(request.args.get("k", 10, type=int), 1), 100)
+    neighbours = get_catalog().feature_space.similar(track_id, k)
+    if neighbours is None:
+        return jsonify({"status": "error", "message": "Track not found"}), 404
+
+    found, _ = get_track_features_by_ids(neighbour_id for neighbour_id, _ in neighbours)
+    similar = [
+        {**found[neighbour_id], "distance": round(distance, 4)}
+        for neighbour_id, distance in neighbours
+    ]
+    return jsonify({"id": track_id, "similar": similar})
+
+
+# ---------- Playlist Recommendations (feature centroid) ----------
+@upload_bp.route("/api/playlist/<int:playlist_id>/recommendations", methods=["GET"])
+@login_required
+def playlist_recommendations(playlist_id):
+    playlist = Playlist.query.filter_by(id=playlist_id, owner_id=current_user.id).first()
+    if not playlist:
+        return jsonify({"status": "error", "message": "Playlist not found"}), 404
+    k = min(max(request.args.get("k", 10, type=int), 1), 100)
+
+    tracks = (
+        Track.query.join(PlaylistTrack, PlaylistTrack.track_id == Track.id)
+        .filter(PlaylistTrack.playlist_id == playlist.id)
+        .all()
+    )
+    if not tracks:
+        return jsonify({"playlist_id": playlist.id, "recommendations": []})
+
+    ranked, profile = recommend(get_catalog(), tracks, k)
+    found, _ = get_track_features_by_ids(track_id for track_id, _ in ranked)
+    return jsonify({
+        "playlist_id": playlist.id,
+        "centroid": profile["centroid"],
+        "spread": profile["spread"],
+        "recommendations": [
+            {**found[track_id], "distance": round(distance, 4)} for track_id, distance in ranked
+        ]
+    })
+
+
+# ---------- Search Cache Metrics ----------
+@upload_bp.route("/api/metrics")
+@login_required
+def api_metrics():
+    return jsonify({
+        "search_cache": search_cache.stats(),
+        "search_coalescing": search_flight.stats(),
+        "spotify_circuit": spotify_breaker.stats(),
+        "enrichment_cache": enrichment_cache.stats(),
+        "spotify_response_cache": response_cache.stats()
+    })
 
 
 # ---------- Create Playlist ----------
@@ -99,76 +232,23 @@ def create_playlist():
             db.session.flush()  # Ensures playlist.id is generated
             logger.debug(f"Created playlist with ID: {playlist.id}")
 
-            # Add tracks to playlist
+            # Validate and convert every submitted track first
+            specs = []
             for index, song in enumerate(tracks):
-                # Handle the different key naming in frontend and backend
-                title = song.get("title") or song.get("name")
-                artist = song.get("artist")
-                
-                # Basic validation
-                if not title or not artist:
+                spec = parse_track(song)
+                if spec is None:
                     logger.warning(f"Skipping track at index {index} - missing title or artist")
                     continue
+                specs.append(spec)
 
-                # Convert string values to appropriate types
-                try:
-                    duration = int(song.get("duration_ms", 0))
-                    tempo = float(song.get("tempo")) if song.get("tempo") is not None else None
-                    danceability = float(song.get("danceability")) if song.get("danceability") is not None else None
-                    energy = float(song.get("energy")) if song.get("energy") is not None else None
-                    liveness = float(song.get("liveness")) if song.get("liveness") is not None else None
-                    acousticness = float(song.get("acousticness")) if song.get("acousticness") is not None else None
-                    valence = float(song.get("valence")) if song.get("valence") is not None else None
-                except (ValueError, TypeError) as e:
-                    logger.warning(f"Type conversion error for track {title}: {str(e)}")
-                    # Use default values instead of failing
-                    duration = 0
-                    tempo = None
-                    danceability = None
-                    energy = None
-                    liveness = None
-                    acousticness = None
-                    valence = None
-                
-                # Get or create track
-                track = Track.query.filter_by(title=title, artist=artist).first()
-                if not track:
-                    logger.debug(f"Creating new track: {title} by {artist}")
-                    track = Track(
-                        title=title,
-                        artist=artist,
-                        genre=song.get("genre"),
-                        tempo=tempo,
-                        valence=valence,
-                        energy=energy,
-                        acousticness=acousticness,
-                        liveness=liveness,
-                        danceability=danceability,
-                        mode=song.get("mode"),
-                        duration_ms=duration,  # Adding the duration_ms field
-                        user_id=current_user.id
-                    )
-                    db.session.add(track)
-                    db.session.flush()
-
-                # Create playlist-track relationship
-                db.session.add(PlaylistTrack(playlist_id=playlist.id, track_id=track.id))
-                logger.debug(f"Added track {track.id} to playlist {playlist.id}")
-
-                # Add to user tracks if not already there
-                user_track = UserTrack.query.filter_by(user_id=current_user.id, track_id=track.id).first()
-                if not user_track:
-                    logger.debug(f"Adding track {track.id} to user {current_user.id}'s collection")
-                    user_track = UserTrack(
-                        user_id=current_user.id,
-                        track_id=track.id,
-                        song=title,
-                        artist=artist,
-                        song_duration=duration,
-                        times_played=1,
-                        total_ms_listened=duration
-                    )
-                    db.session.add(user_track)
+            # Resolve all tracks with a few IN queries and bulk-insert the missing rows
+            track_ids = get_or_create_tracks(specs, current_user.id)
+            specs_by_track_id = {}
+            for spec in specs:
+                specs_by_track_id.setdefault(track_ids[(spec["title"], spec["artist"])], spec)
+            insert_playlist_tracks(playlist.id, specs_by_track_id)
+            add_user_tracks(current_user.id, specs_by_track_id)
+            logger.debug(f"Added {len(specs_by_track_id)} tracks to playlist {playlist.id}")
 
             # Commit all changes
             db.session.commit()
@@ -222,34 +302,53 @@ def get_playlist(playlist_id):
     
     if not playlist:
         return jsonify({"status": "error", "message": "Playlist not found"}), 404
-    
-    tracks = []
-    for pt in PlaylistTrack.query.filter_by(playlist_id=playlist.id).all():
-        track = Track.query.get(pt.track_id)
-        if track:
-            tracks.append({
-                "id": track.id,
-                "title": track.title,
-                "artist": track.artist,
-                "genre": track.genre,
-                "danceability": track.danceability,
-                "energy": track.energy,
-                "liveness": track.liveness,
-                "acousticness": track.acousticness,
-                "valence": track.valence,
-                "tempo": track.tempo,
-                "mode": track.mode,
-                "duration_ms": track.duration_ms
-            })
-    
-    return jsonify({
-        "status": "success",
-        "playlist": {
-            "id": playlist.id,
-            "name": playlist.name,
-            "tracks": tracks
-        }
-    })
+
+    page = page_args()
+    if page is None:
+        return jsonify({"status": "error", "message": "Invalid cursor"}), 400
+    limit, after = page
+
+    # The version changes with every edit and ids are never reused, so a
+    # matching ETag means the client's copy of this page is current and the
+    # tracks need not be loaded at all
+    etag = f"playlist-{playlist.id}-v{playlist.version}"
+    if request.if_none_match.contains_weak(etag):
+        response = current_app.response_class(status=304)
+    else:
+        tracks, next_cursor = keyset_page(
+            Track.query.join(PlaylistTrack, PlaylistTrack.track_id == Track.id)
+            .filter(PlaylistTrack.playlist_id == playlist.id),
+            PlaylistTrack.track_id, limit, after
+        )
+        response = jsonify({
+            "status": "success",
+            "playlist": {
+                "id": playlist.id,
+                "name": playlist.name,
+                "tracks": [
+                    {
+                        "id": track.id,
+                        "title": track.title,
+                        "artist": track.artist,
+                        "genre": track.genre,
+                        "danceability": track.danceability,
+                        "energy": track.energy,
+                        "liveness": track.liveness,
+                        "acousticness": track.acousticness,
+                        "valence": track.valence,
+                        "tempo": track.tempo,
+                        "mode": track.mode,
+                        "duration_ms": track.duration_ms
+                    } for track in tracks
+                ]
+            },
+            "next_cursor": next_cursor
+        })
+
+    response.set_etag(etag, weak=True)
+    # Let the browser keep a copy but revalidate it on every load
+    response.headers["Cache-Control"] = "private, no-cache"
+    return response
 
 # ---------- Add Track to Playlist ----------
 @upload_bp.route("/api/playlist/<int:playlist_id>/add-track", methods=["POST"])
@@ -264,53 +363,12 @@ def add_track_to_playlist(playlist_id):
     track_id = data.get("track_id")
     
     if not track_id:
-        # Extract track data and create a new track
-        title = data.get("title")
-        artist = data.get("artist")
-        
-        if not title or not artist:
+        # Find or create the track from the submitted data
+        spec = parse_track(data)
+        if not spec:
             return jsonify({"status": "error", "message": "Track title and artist required"}), 400
-        
-        # Check if track exists
-        track = Track.query.filter_by(title=title, artist=artist).first()
-        
-        if not track:
-            # Create new track with all available data
-            try:
-                duration = int(data.get("duration_ms", 0))
-                tempo = float(data.get("tempo")) if data.get("tempo") else None
-                danceability = float(data.get("danceability")) if data.get("danceability") else None
-                energy = float(data.get("energy")) if data.get("energy") else None
-                liveness = float(data.get("liveness")) if data.get("liveness") else None
-                acousticness = float(data.get("acousticness")) if data.get("acousticness") else None
-                valence = float(data.get("valence")) if data.get("valence") else None
-            except (ValueError, TypeError):
-                duration = 0
-                tempo = None
-                danceability = None
-                energy = None
-                liveness = None
-                acousticness = None
-                valence = None
-                
-            track = Track(
-                title=title,
-                artist=artist,
-                genre=data.get("genre"),
-                tempo=tempo,
-                valence=valence,
-                energy=energy,
-                acousticness=acousticness,
-                liveness=liveness,
-                danceability=danceability,
-                mode=data.get("mode"),
-                duration_ms=duration,
-                user_id=current_user.id
-            )
-            db.session.add(track)
-            db.session.flush()
-        
-        track_id = track.id
+
+        track_id = get_or_create_track(spec, current_user.id)
     
     # Check if track is already in playlist
     existing = PlaylistTrack.query.filter_by(playlist_id=playlist_id, track_id=track_id).first()
@@ -320,6 +378,7 @@ def add_track_to_playlist(playlist_id):
     # Add track to playlist
     playlist_track = PlaylistTrack(playlist_id=playlist_id, track_id=track_id)
     db.session.add(playlist_track)
+    bump_playlist_version(playlist_id)
     
     # Add to user tracks if not already there
     user_track = UserTrack.query.filter_by(user_id=current_user.id, track_id=track_id).first()
@@ -355,10 +414,81 @@ def remove_track_from_playlist(playlist_id, track_id):
         return jsonify({"status": "error", "message": "Track not in playlist"}), 404
     
     db.session.delete(playlist_track)
+    bump_playlist_version(playlist_id)
     db.session.commit()
     
     return jsonify({"status": "success", "message": "Track removed from playlist"})
 
+# ---------- Batch Add/Remove Playlist Tracks ----------
+@upload_bp.route("/api/playlist/<int:playlist_id>/tracks:batch", methods=["POST"])
+@login_required
+def batch_update_playlist_tracks(playlist_id):
+    """
+    Apply {"add": [...], "remove": [...]} to a playlist in one transaction.
+    Additions are track ids or track dicts as accepted by add-track;
+    removals are track ids and are applied first.
+    """
+    playlist = Playlist.query.filter_by(id=playlist_id, owner_id=current_user.id).first()
+
+    if not playlist:
+        return jsonify({"status": "error", "message": "Playlist not found"}), 404
+
+    data = request.get_json(silent=True) or {}
+    additions = data.get("add", [])
+    removals = data.get("remove", [])
+
+    if not isinstance(additions, list) or not isinstance(removals, list):
+        return jsonify({"status": "error", "message": "add and remove must be lists"}), 400
+    if len(additions) + len(removals) > MAX_BATCH_TRACKS:
+        return jsonify({"status": "error", "message": f"At most {MAX_BATCH_TRACKS} tracks per batch"}), 400
+    if not all(isinstance(track_id, int) and not isinstance(track_id, bool) for track_id in removals):
+        return jsonify({"status": "error", "message": "remove must contain track ids"}), 400
+
+    # Validate everything before writing so a bad entry leaves the playlist untouched
+    add_ids, specs = [], []
+    for position, item in enumerate(additions):
+        if isinstance(item, int) and not isinstance(item, bool):
+            add_ids.append(item)
+            continue
+        spec = parse_track(item) if isinstance(item, dict) else None
+        if not spec:
+            return jsonify({"status": "error", "message": f"add[{position}] needs a track id or a title and artist"}), 400
+        specs.append(spec)
+
+    specs_by_track_id = find_tracks_by_id(add_ids)
+    unknown = [track_id for track_id in dict.fromkeys(add_ids) if track_id not in specs_by_track_id]
+    if unknown:
+        return jsonify({"status": "error", "message": f"Unknown track ids: {unknown}"}), 400
+
+    try:
+        removed = playlist_track_ids(playlist_id, removals)
+        delete_playlist_tracks(playlist_id, removed)
+
+        track_ids = get_or_create_tracks(specs, current_user.id)
+        for spec in specs:
+            specs_by_track_id.setdefault(track_ids[(spec["title"], spec["artist"])], spec)
+        requested = list(dict.fromkeys(add_ids + [track_ids[(spec["title"], spec["artist"])] for spec in specs]))
+
+        already_linked = playlist_track_ids(playlist_id, requested)
+        added = [track_id for track_id in requested if track_id not in already_linked]
+        insert_playlist_tracks(playlist_id, added)
+        add_user_tracks(current_user.id, {track_id: specs_by_track_id[track_id] for track_id in added})
+        if added or removed:
+            bump_playlist_version(playlist_id)
+
+        db.session.commit()
+    except Exception as e:
+        db.session.rollback()
+        logger.error(f"Batch update of playlist {playlist_id} failed: {str(e)}")
+        return jsonify({"status": "error", "message": "Failed to update playlist"}), 500
+
+    return jsonify({
+        "status": "success",
+        "added": added,
+        "removed": sorted(removed),
+        "skipped": [track_id for track_id in requested if track_id in already_linked]
+    })
+
 # ---------- Update Playlist ----------
 @upload_bp.route("/api/playlist/<int:playlist_id>", methods=["POST"])
 @login_required
@@ -371,8 +501,9 @@ def update_playlist(playlist_id):
     data = request.get_json()
     new_name = data.get("name")
     
-    if new_name:
+    if new_name and new_name != playlist.name:
         playlist.name = new_name
+        bump_playlist_version(playlist.id)
         db.session.commit()
     
     return jsonify({
@@ -406,7 +537,14 @@ def delete_playlist(playlist_id):
 @upload_bp.route("/api/playlists", methods=["GET"])
 @login_required
 def get_playlists():
-    playlists = Playlist.query.filter_by(owner_id=current_user.id).all()
+    page = page_args()
+    if page is None:
+        return jsonify({"status": "error", "message": "Invalid cursor"}), 400
+    limit, after = page
+
+    playlists, next_cursor = keyset_page(
+        Playlist.query.filter_by(owner_id=current_user.id), Playlist.id, limit, after
+    )
     return jsonify({
         "status": "success",
         "playlists": [
@@ -414,5 +552,6 @@ def get_playlists():
                 "id": playlist.id,
                 "name": playlist.name
             } for playlist in playlists
-        ]
+        ],
+        "next_cursor": next_cursor
     })
\ No newline at end of file
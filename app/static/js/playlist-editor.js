@@ -215,6 +215,36 @@ document.addEventListener('DOMContentLoaded', function() {
     }
 
     // Load playlist tracks
+    // Fetch every page of a playlist's tracks, following next_cursor, and
+    // resolve with the first page's response holding all of the tracks.
+    // The browser revalidates each page with the playlist's ETag and reuses
+    // its copy on 304 Not Modified
+    function fetchPlaylist(playlistId, cursor = null, pages = []) {
+        const url = cursor
+            ? `/api/playlist/${playlistId}?cursor=${encodeURIComponent(cursor)}`
+            : `/api/playlist/${playlistId}`;
+
+        return fetch(url, { cache: 'no-cache' })
+        .then(response => {
+            if (!response.ok) {
+            throw new Error('Failed to load playlist');
+            }
+            return response.json();
+        })
+        .then(data => {
+            if (data.status !== 'success' || !data.playlist || !data.playlist.tracks) {
+            return data;
+            }
+            pages.push(data);
+            if (data.next_cursor) {
+            return fetchPlaylist(playlistId, data.next_cursor, pages);
+            }
+            const first = pages[0];
+            first.playlist.tracks = pages.flatMap(page => page.playlist.tracks);
+            return first;
+        });
+    }
+
     function loadPlaylistTracks(playlistId) {
         // Clear previous tracks
         modalSongList.innerHTML = '';
@@ -223,13 +253,7 @@ document.addEventListener('DOMContentLoaded', function() {
         modalSongList.innerHTML = '<div class="py-6 text-center text-gray-500">Loading songs...</div>';
         
         // Fetch playlist tracks from server
-        fetch(`/api/playlist/${playlistId}`)
-        .then(response => {
-            if (!response.ok) {
-            throw new Error('Failed to load playlist');
-            }
-            return response.json();
-        })
+        fetchPlaylist(playlistId)
         .then(data => {
             if (data.status === 'success' && data.playlist && data.playlist.tracks) {
             currentPlaylistTracks = data.playlist.tracks;
@@ -310,48 +334,58 @@ document.addEventListener('DOMContentLoaded', function() {
         return `${minutes}:${seconds.toString().padStart(2, '0')}`;
     }
 
-    // Remove song from playlist
-    function removeSongFromPlaylist(trackId) {
-        if (!currentPlaylistId || !trackId) return;
-        
-        fetch(`/api/playlist/${currentPlaylistId}/remove-track/${trackId}`, {
-        method: 'DELETE',
+    // Send track additions/removals for a playlist in one request
+    function batchUpdateTracks(playlistId, changes) {
+        return fetch(`/api/playlist/${playlistId}/tracks:batch`, {
+        method: 'POST',
         headers: {
             'X-CSRFToken': window.CSRF_TOKEN,
             'Content-Type': 'application/json'
-        }
+        },
+        body: JSON.stringify(changes)
         })
         .then(response => {
             if (!response.ok) {
-            throw new Error('Failed to remove track');
+            throw new Error('Failed to update playlist tracks');
             }
             return response.json();
-        })
+        });
+    }
+
+    // Remove song from playlist
+    function removeSongFromPlaylist(trackId) {
+        if (!currentPlaylistId || !trackId) return;
+
+        const playlistId = currentPlaylistId;
+
+        // Sent straight away so a reload or navigation cannot drop the removal
+        batchUpdateTracks(playlistId, { remove: [trackId] })
         .then(data => {
-            if (data.status === 'success') {
+            if (data.status !== 'success') {
+            throw new Error(data.message || 'Failed to remove track');
+            }
+            if (currentPlaylistId !== playlistId) return;
+
             // Remove from UI
             const trackElement = modalSongList.querySelector(`li[data-id="${trackId}"]`);
             if (trackElement) {
-                trackElement.classList.add('opacity-0');
-                setTimeout(() => {
+            trackElement.classList.add('opacity-0');
+            setTimeout(() => {
                 trackElement.remove();
-                
-                // Update tracks array
-                currentPlaylistTracks = currentPlaylistTracks.filter(track => track.id !== trackId);
-                
+
                 // Show empty message if no tracks left
                 if (currentPlaylistTracks.length === 0) {
-                    modalSongList.innerHTML = '<div class="py-6 text-center text-gray-500">No songs in this playlist yet.</div>';
+                modalSongList.innerHTML = '<div class="py-6 text-center text-gray-500">No songs in this playlist yet.</div>';
                 }
-                
-                // Update sidebar count
-                updateSidebarPlaylistCount(currentPlaylistId, currentPlaylistTracks.length);
-                updatePlaylistCount(currentPlaylistId, currentPlaylistTracks.length);
-                }, 300);
-            }
-            } else {
-            alert('Failed to remove track from playlist.');
+            }, 300);
             }
+
+            // Update tracks array
+            currentPlaylistTracks = currentPlaylistTracks.filter(track => track.id !== trackId);
+
+            // Update sidebar count
+            updateSidebarPlaylistCount(playlistId, currentPlaylistTracks.length);
+            updatePlaylistCount(playlistId, currentPlaylistTracks.length);
         })
         .catch(error => {
             console.error('Error removing track:', error);
@@ -508,24 +542,16 @@ document.addEventListener('DOMContentLoaded', function() {
             };
             
             // Add to playlist via API
-            fetch(`/api/playlist/${currentPlaylistId}/add-track`, {
-            method: 'POST',
-            headers: {
-                'X-CSRFToken': window.CSRF_TOKEN,
-                'Content-Type': 'application/json'
-            },
-            body: JSON.stringify(trackToAdd)
-            })
-            .then(response => {
-                if (!response.ok) {
-                throw new Error('Failed to add track');
-                }
-                return response.json();
-            })
+            batchUpdateTracks(currentPlaylistId, { add: [trackToAdd] })
             .then(data => {
                 if (data.status === 'success') {
                 // Update the playlist count in the sidebar
-                updatePlaylistCount(currentPlaylistId, currentPlaylistTracks.length + 1);
+                updatePlaylistCount(currentPlaylistId, currentPlaylistTracks.length + data.added.length);
+
+                // The batch endpoint skips tracks that are already in the playlist
+                if (data.skipped.length > 0) {
+                    showToast(`"${trackToAdd.title}" is already in this playlist.`, 'info');
+                }
                 
                 // Reload tracks to show the newly added one
                 loadPlaylistTracks(currentPlaylistId);
@@ -545,6 +571,7 @@ document.addEventListener('DOMContentLoaded', function() {
             .catch(error => {
                 console.error('Error adding track:', error);
                 alert('An error occurred while adding the track.');
+                loadPlaylistTracks(currentPlaylistId);
             });
             
         } catch (error) {
@@ -0,0 +1,253 @@
+import os
+import threading
+import unicodedata
+import numpy as np
+import pandas as pd
+from app.utils.columnar import read_columnar, write_columnar
+from app.utils.feature_index import FeatureSpace
+from app.utils.text_index import ArtistTokenIndex, CatalogSearchIndex, PrefixIndex, TrigramIndex
+
+# Keys of the dict returned by get_track_features_by_id, in row-tuple order
+FEATURE_KEYS = (
+    "id", "name", "artist", "album", "genre", "duration_ms",
+    "danceability", "energy", "liveness", "acousticness", "valence", "tempo", "mode"
+)
+
+# Numerical columns used for track similarity
+NUMERICAL_FEATURES = ['danceability', 'energy', 'valence', 'tempo', 'acousticness', 'liveness']
+
+DEFAULT_CSV_PATH = "spotify.csv"
+DEFAULT_COMPILED_PATH = os.path.join("instance", "catalog.bin")
+
+_csv_path = DEFAULT_CSV_PATH
+_compiled_path = DEFAULT_COMPILED_PATH
+_catalog = None
+_lock = threading.Lock()
+
+# Unicode-safe normalization for multilingual support
+def normalize_str(s):
+    if pd.isna(s):
+        return ""
+    return unicodedata.normalize('NFKC', str(s)).casefold().strip()
+
+def build_track_index(frame):
+    """
+    Build a track_id -> feature tuple hash index over a catalog frame.
+    Values are precomputed in FEATURE_KEYS order so a lookup is a single
+    dict access; the first row wins when a track_id appears more than once.
+    """
+    rows = zip(
+        frame["track_id"],
+        frame["track_name"],
+        frame["artists"],
+        frame["album_name"],
+        frame["track_genre"],
+        frame["duration_ms"].astype(int),
+        frame["danceability"].astype(float).round(3),
+        frame["energy"].astype(float).round(3),
+        frame["liveness"].astype(float).round(3),
+        frame["acousticness"].astype(float).round(3),
+        frame["valence"].astype(float).round(3),
+        frame["tempo"].astype(float).round(2),
+        (frame["mode"] == 1).map({True: "Major", False: "Minor"}),
+    )
+    index = {}
+    for row in rows:
+        index.setdefault(row[0], row)
+    return index
+
+def load_catalog_frame(path):
+    """
+    Read spotify.csv and add the normalized columns used for fuzzy matching.
+    """
+    df = pd.read_csv(path)
+    df.columns = df.columns.str.strip()
+    df["track_id"] = df["track_id"].astype(str)
+
+    # Create normalized columns for fuzzy matching
+    df['normalized_track_name'] = df['track_name'].apply(normalize_str)
+    df['normalized_artists'] = df['artists'].apply(normalize_str)
+
+    for col in NUMERICAL_FEATURES:
+        if col in df.columns:
+            df[col] = pd.to_numeric(df[col], errors='coerce')
+
+    print(f"Preprocessed dataframe with {len(df)} rows")
+    return df
+
+
+class Catalog:
+    """
+    The local track catalog plus the lookup structures derived from it.
+    Derived indexes are built on first use and kept for the process lifetime.
+    """
+
+    DERIVED = ("track_index", "title_index", "artist_index", "search_index", "typeahead_index", "feature_space")
+
+    def __init__(self, df):
+        self.df = df
+        self._track_index = None
+        self._title_index = None
+        self._artist_index = None
+        self._search_index = None
+        self._typeahead_index = None
+        self._feature_space = None
+        # One lock per derived index, so concurrent first uses build it once
+        # without serialising the builds of different indexes
+        self._locks = {name: threading.Lock() for name in self.DERIVED}
+
+    @classmethod
+    def from_csv(cls, path):
+        return cls(load_catalog_frame(path))
+
+    @classmethod
+    def from_compiled(cls, path):
+        return cls(read_columnar(path))
+
+    def _derived(self, name, build):
+        """
+        The derived index cached as self._<name>, built with build() on first
+        use; double-checked under the index's lock, like get_catalog().
+        """
+        value = getattr(self, '_' + name)
+        if value is None:
+            with self._locks[name]:
+                value = getattr(self, '_' + name)
+                if value is None:
+                    value = build()
+                    setattr(self, '_' + name, value)
+        return value
+
+    @property
+    def track_index(self):
+        return self._derived('track_index', self._build_track_index)
+
+    def _build_track_index(self):
+        return build_track_index(self.df)
+
+    @property
+    def title_index(self):
+        """Trigram index over the distinct normalized track names."""
+        return self._derived('title_index', self._build_title_index)
+
+    def _build_title_index(self):
+        titles = pd.unique(self.df['normalized_track_name'].astype(object).fillna(""))
+        return TrigramIndex(titles)
+
+    @property
+    def artist_index(self):
+        """Artist name -> row ids index over the normalized artists column."""
+        return self._derived('artist_index', self._build_artist_index)
+
+    def _build_artist_index(self):
+        return ArtistTokenIndex(self.df['normalized_artists'].astype(object).fillna(""))
+
+    @property
+    def search_index(self):
+        """Full-text index over title, artists and album for offline search."""
+        return self._derived('search_index', self._build_search_index)
+
+    def _build_search_index(self):
+        df = self.df
+        albums = df['album_name'].map(normalize_str).astype(object).fillna("")
+        popularity = df['popularity'].fillna(0).to_numpy() if 'popularity' in df.columns else np.zeros(len(df))
+        return CatalogSearchIndex(
+            df['normalized_track_name'].astype(object).fillna(""),
+            df['normalized_artists'].astype(object).fillna(""),
+            albums,
+            popularity
+        )
+
+    @property
+    def typeahead_index(self):
+        """Prefix index over distinct titles and individual artists, ranked by popularity."""
+        return self._derived('typeahead_index', self._build_typeahead_index)
+
+    def _build_typeahead_index(self):
+        df = self.df
+        popularity = df['popularity'].fillna(0) if 'popularity' in df.columns else pd.Series(0, index=df.index)
+        titles = pd.DataFrame({
+            'key': df['normalized_track_name'].astype(object),
+            'label': df['track_name'].astype(object),
+            'score': popularity.to_numpy(),
+        })
+        artists = pd.DataFrame({
+            'label': df['artists'].astype(object).str.split(';'),
+            'score': popularity.to_numpy(),
+        }).explode('label')
+        artists['label'] = artists['label'].str.strip()
+        artists['key'] = artists['label'].map(normalize_str)
+
+        entries = []
+        for kind, frame in (("track", titles), ("artist", artists)):
+            # One entry per normalized name, labelled by its most popular spelling
+            frame = frame[frame['key'].astype(bool) & frame['label'].notna()]
+            frame = frame.sort_values('score', ascending=False, kind='stable').drop_duplicates('key')
+            entries.append(frame.assign(kind=kind))
+        entries = pd.concat(entries, ignore_index=True)
+        return PrefixIndex(
+            entries['key'].tolist(), entries['label'].tolist(),
+            entries['kind'].tolist(), entries['score'].to_numpy()
+        )
+
+    @property
+    def feature_space(self):
+        """Standardized NUMERICAL_FEATURES matrix and KD-tree, one row per track_id."""
+        return self._derived('feature_space', self._build_feature_space)
+
+    def _build_feature_space(self):
+        unique = self.df.drop_duplicates('track_id')
+        return FeatureSpace(
+            unique['track_id'].astype(str).to_numpy(),
+            unique[NUMERICAL_FEATURES].to_numpy(dtype=np.float64, na_value=np.nan)
+        )
+
+
+def compile_catalog(csv_path, compiled_path):
+    """
+    Convert spotify.csv into the memory-mapped columnar format.
+    Returns the number of rows written.
+    """
+    df = load_catalog_frame(csv_path)
+    directory = os.path.dirname(compiled_path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    write_columnar(df, compiled_path)
+    return len(df)
+
+def _load_catalog():
+    # Prefer the compiled file unless spotify.csv has been updated since
+    if os.path.exists(_compiled_path):
+        if not os.path.exists(_csv_path) or os.path.getmtime(_compiled_path) >= os.path.getmtime(_csv_path):
+            print(f"Opening compiled catalog {_compiled_path}")
+            return Catalog.from_compiled(_compiled_path)
+        print(f"Compiled catalog {_compiled_path} is older than {_csv_path}, ignoring it")
+    return Catalog.from_csv(_csv_path)
+
+def init_app(app):
+    """
+    Point the registry at the app's configured catalog files. Nothing is
+    read here; the catalog loads on the first get_catalog() call.
+    """
+    global _csv_path, _compiled_path
+    _csv_path = app.config.get('CATALOG_CSV_PATH', DEFAULT_CSV_PATH)
+    _compiled_path = app.config.get('CATALOG_COMPILED_PATH', DEFAULT_COMPILED_PATH)
+
+def get_catalog():
+    """
+    Return the process-wide Catalog, loading it on first use.
+    """
+    global _catalog
+    if _catalog is None:
+        with _lock:
+            if _catalog is None:
+                _catalog = _load_catalog()
+    return _catalog
+
+def set_catalog(catalog):
+    """
+    Replace the process-wide catalog (None forces a reload on next use).
+    """
+    global _catalog
+    with _lock:
+        _catalog = catalog
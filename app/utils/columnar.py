@@ -0,0 +1,147 @@
+"""
+Binary columnar file format for the track catalog.
+
+Layout: an 8-byte magic, a little-endian uint64 header length, a JSON header
+describing every column, then the column sections, each aligned to 64 bytes.
+Numeric columns are stored as fixed-width little-endian arrays; string columns
+are dictionary-encoded as integer codes plus a UTF-8 blob of the distinct
+values and their int64 offsets. Readers map the whole file with numpy.memmap,
+so the pages are shared between every process that opens it.
+"""
+import json
+import os
+import numpy as np
+import pandas as pd
+
+MAGIC = b"SPCAT01\n"
+ALIGNMENT = 64
+
+# Fixed-width storage type per numeric column; other columns are skipped
+NUMERIC_DTYPES = {
+    "danceability": "<f4",
+    "energy": "<f4",
+    "loudness": "<f4",
+    "speechiness": "<f4",
+    "acousticness": "<f4",
+    "instrumentalness": "<f4",
+    "liveness": "<f4",
+    "valence": "<f4",
+    "tempo": "<f4",
+    "popularity": "<i2",
+    "duration_ms": "<i4",
+    "key": "<i1",
+    "mode": "<i1",
+    "time_signature": "<i1",
+}
+
+# String columns stored as dictionary codes
+DICTIONARY_COLUMNS = [
+    "track_id", "track_name", "artists", "album_name", "track_genre",
+    "normalized_track_name", "normalized_artists",
+]
+
+
+def _codes_dtype(count):
+    # Same width pandas picks for categorical codes, so reading never copies
+    if count < np.iinfo(np.int8).max:
+        return "<i1"
+    if count < np.iinfo(np.int16).max:
+        return "<i2"
+    return "<i4"
+
+
+def write_columnar(df, path):
+    """
+    Write the catalog frame to path in the columnar format.
+    The file is written next to path and renamed into place, so readers
+    never see a partially written catalog.
+    """
+    sections = []
+    columns = []
+    for name, dtype in NUMERIC_DTYPES.items():
+        if name not in df.columns:
+            continue
+        values = pd.to_numeric(df[name], errors="coerce")
+        if np.dtype(dtype).kind == "i":
+            values = values.fillna(0)
+        data = values.to_numpy().astype(dtype)
+        columns.append({"name": name, "kind": "numeric", "dtype": dtype})
+        sections.append([data])
+
+    for name in DICTIONARY_COLUMNS:
+        if name not in df.columns:
+            continue
+        categorical = pd.Categorical(df[name])
+        encoded = [str(value).encode("utf-8") for value in categorical.categories]
+        offsets = np.zeros(len(encoded) + 1, dtype="<i8")
+        np.cumsum([len(value) for value in encoded], out=offsets[1:])
+        codes = categorical.codes.astype(_codes_dtype(len(encoded)))
+        columns.append({
+            "name": name,
+            "kind": "dictionary",
+            "dtype": codes.dtype.str,
+            "count": len(encoded),
+        })
+        sections.append([codes, offsets, np.frombuffer(b"".join(encoded), dtype=np.uint8)])
+
+    # Section offsets are stored in the header, so re-layout until its size settles
+    header = {"rows": len(df), "columns": columns}
+    blob = b""
+    while True:
+        position = len(MAGIC) + 8 + len(blob)
+        for column, arrays in zip(columns, sections):
+            column["offsets"] = []
+            for array in arrays:
+                position += -position % ALIGNMENT
+                column["offsets"].append(position)
+                position += array.nbytes
+        laid_out = json.dumps(header).encode("utf-8")
+        settled = len(laid_out) == len(blob)
+        blob = laid_out
+        if settled:
+            break
+
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "wb") as handle:
+        handle.write(MAGIC)
+        handle.write(np.uint64(len(blob)).astype("<u8").tobytes())
+        handle.write(blob)
+        for column, arrays in zip(columns, sections):
+            for offset, array in zip(column["offsets"], arrays):
+                handle.write(b"\0" * (offset - handle.tell()))
+                handle.write(np.ascontiguousarray(array).tobytes())
+    os.replace(tmp_path, path)
+
+
+def read_columnar(path):
+    """
+    Open a columnar catalog file as a DataFrame backed by a read-only memmap.
+    Numeric columns are zero-copy views; string columns become categoricals
+    whose codes are views and whose distinct values are decoded once.
+    """
+    buffer = np.memmap(path, dtype=np.uint8, mode="r")
+    if bytes(buffer[:len(MAGIC)]) != MAGIC:
+        raise ValueError(f"{path} is not a compiled catalog file")
+    start = len(MAGIC) + 8
+    header_length = int(buffer[len(MAGIC):start].view("<u8")[0])
+    header = json.loads(bytes(buffer[start:start + header_length]))
+    rows = header["rows"]
+
+    data = {}
+    for column in header["columns"]:
+        dtype = np.dtype(column["dtype"])
+        offset = column["offsets"][0]
+        values = buffer[offset:offset + rows * dtype.itemsize].view(dtype)
+        if column["kind"] == "numeric":
+            data[column["name"]] = values
+            continue
+
+        count = column["count"]
+        offsets_at, blob_at = column["offsets"][1:]
+        offsets = buffer[offsets_at:offsets_at + (count + 1) * 8].view("<i8")
+        blob = bytes(buffer[blob_at:blob_at + int(offsets[-1])])
+        bounds = offsets.tolist()
+        categories = [blob[bounds[i]:bounds[i + 1]].decode("utf-8") for i in range(count)]
+        data[column["name"]] = pd.Categorical.from_codes(values, categories=categories, validate=False)
+
+    return pd.DataFrame(data, copy=False)
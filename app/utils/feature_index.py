@@ -0,0 +1,136 @@
+"""
+Nearest-neighbour search over the catalog's audio features.
+"""
+import heapq
+import numpy as np
+
+
+class KDTree:
+    """
+    NumPy KD-tree for Euclidean k-nearest-neighbour queries.
+
+    Nodes split their points at the median of the widest dimension until
+    they hold at most leaf_size points. Points are reordered so every node
+    covers a contiguous slice, and each node keeps its bounding box, which
+    queries use to skip nodes that cannot beat the current k-th distance.
+    """
+
+    def __init__(self, points, leaf_size=64):
+        points = np.ascontiguousarray(points, dtype=np.float32)
+        self.leaf_size = leaf_size
+        self.index = np.arange(len(points))
+        starts, ends, lefts, rights, lowers, uppers = [], [], [], [], [], []
+
+        def add_node(start, end):
+            segment = points[self.index[start:end]]
+            starts.append(start)
+            ends.append(end)
+            lefts.append(-1)
+            rights.append(-1)
+            lowers.append(segment.min(axis=0) if end > start else np.zeros(points.shape[1], np.float32))
+            uppers.append(segment.max(axis=0) if end > start else np.zeros(points.shape[1], np.float32))
+            return len(starts) - 1
+
+        stack = [add_node(0, len(points))]
+        while stack:
+            node = stack.pop()
+            start, end = starts[node], ends[node]
+            if end - start <= leaf_size:
+                continue
+            dim = int(np.argmax(uppers[node] - lowers[node]))
+            mid = (start + end) // 2
+            segment = self.index[start:end]
+            self.index[start:end] = segment[np.argpartition(points[segment, dim], mid - start)]
+            lefts[node] = add_node(start, mid)
+            rights[node] = add_node(mid, end)
+            stack.extend((lefts[node], rights[node]))
+
+        self.points = points[self.index]
+        self.starts = starts
+        self.ends = ends
+        self.lefts = lefts
+        self.rights = rights
+        self.lowers = np.asarray(lowers, dtype=np.float32)
+        self.uppers = np.asarray(uppers, dtype=np.float32)
+
+    def _box_distance(self, node, x):
+        gap = np.maximum(self.lowers[node] - x, 0) + np.maximum(x - self.uppers[node], 0)
+        return float(gap @ gap)
+
+    def query(self, x, k=10):
+        """
+        Return (ids, distances) of the k points nearest to x, nearest first;
+        ids are positions in the points array the tree was built from.
+        """
+        x = np.asarray(x, dtype=np.float32)
+        k = min(k, len(self.points))
+        if k <= 0:
+            return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.float32)
+
+        best_d = np.full(k, np.inf, dtype=np.float32)
+        best_i = np.full(k, -1, dtype=np.int64)
+        heap = [(0.0, 0)]
+        while heap:
+            distance, node = heapq.heappop(heap)
+            if distance > best_d[-1]:
+                break
+            if self.lefts[node] < 0:
+                start, end = self.starts[node], self.ends[node]
+                diff = self.points[start:end] - x
+                d = np.einsum('ij,ij->i', diff, diff)
+                candidates_d = np.concatenate((best_d, d))
+                candidates_i = np.concatenate((best_i, np.arange(start, end)))
+                keep = np.argpartition(candidates_d, k - 1)[:k] if len(candidates_d) > k else np.arange(len(candidates_d))
+                keep = keep[np.lexsort((candidates_i[keep], candidates_d[keep]))]
+                best_d, best_i = candidates_d[keep], candidates_i[keep]
+                continue
+            for child in (self.lefts[node], self.rights[node]):
+                child_distance = self._box_distance(child, x)
+                if child_distance <= best_d[-1]:
+                    heapq.heappush(heap, (child_distance, child))
+
+        found = best_i >= 0
+        return self.index[best_i[found]], np.sqrt(best_d[found])
+
+
+class FeatureSpace:
+    """
+    Standardized float32 matrix of audio features with one row per distinct
+    track_id (the first catalog row wins), plus a KD-tree over it.
+    Missing values are filled with the feature mean, i.e. 0 once standardized.
+    """
+
+    def __init__(self, track_ids, features, leaf_size=64):
+        values = np.asarray(features, dtype=np.float64)
+        self.track_ids = np.asarray(track_ids, dtype=object)
+        self.mean = np.nanmean(values, axis=0)
+        std = np.nanstd(values, axis=0)
+        self.std = np.where(std > 0, std, 1.0)
+        matrix = (values - self.mean) / self.std
+        self.matrix = np.nan_to_num(matrix, nan=0.0).astype(np.float32)
+        self.positions = {track_id: i for i, track_id in enumerate(self.track_ids)}
+        self.tree = KDTree(self.matrix, leaf_size)
+
+    def standardize(self, values):
+        return np.nan_to_num((np.asarray(values, dtype=np.float64) - self.mean) / self.std, nan=0.0).astype(np.float32)
+
+    def nearest(self, vector, k=10, exclude=()):
+        """
+        [(track_id, distance)] of the k tracks closest to a standardized
+        vector, skipping the positions in exclude.
+        """
+        exclude = set(exclude)
+        ids, distances = self.tree.query(vector, k + len(exclude))
+        return [
+            (self.track_ids[i], float(d))
+            for i, d in zip(ids, distances) if i not in exclude
+        ][:k]
+
+    def similar(self, track_id, k=10):
+        """
+        The k tracks most similar to track_id, or None if it is unknown.
+        """
+        position = self.positions.get(track_id)
+        if position is None:
+            return None
+        return self.nearest(self.matrix[position], k, exclude=(position,))
@@ -0,0 +1,72 @@
+"""
+Playlist recommendations from the catalog's standardized feature matrix.
+"""
+import numpy as np
+from app.utils.catalog import NUMERICAL_FEATURES, normalize_str
+from app.utils.text_index import split_artists
+
+# Added to the playlist's per-feature spread (in standard deviations) before
+# weighting, so a one-track playlist or a perfectly uniform feature does not
+# get an unbounded weight
+SPREAD_FLOOR = 0.5
+
+
+def track_key(title, artist):
+    return normalize_str(title), normalize_str(artist)
+
+
+def playlist_profile(space, tracks):
+    """
+    Centroid and spread of the playlist tracks' NUMERICAL_FEATURES, both in
+    raw units and standardized against the catalog.
+    """
+    raw = np.array(
+        [[np.nan if getattr(track, f, None) is None else getattr(track, f) for f in NUMERICAL_FEATURES] for track in tracks],
+        dtype=np.float64
+    )
+    standardized = space.standardize(raw)
+    return {
+        "centroid": dict(zip(NUMERICAL_FEATURES, np.nanmean(raw, axis=0).round(4).tolist())),
+        "spread": dict(zip(NUMERICAL_FEATURES, np.nanstd(raw, axis=0).round(4).tolist())),
+        "vector": standardized.mean(axis=0),
+        "weights": 1.0 / (standardized.std(axis=0) + SPREAD_FLOOR),
+    }
+
+
+def recommend(catalog, tracks, k=10):
+    """
+    Returns ([(track_id, distance)], profile) for the k catalog tracks
+    closest to the playlist centroid, skipping songs already in the
+    playlist (same normalized title and artist). Distance is Euclidean
+    after scaling each feature by the inverse of the playlist's spread, so
+    features the playlist is consistent about count for more.
+    """
+    space = catalog.feature_space
+    profile = playlist_profile(space, tracks)
+    # Stored artists may credit several artists ("Queen;David Bowie"), so
+    # every credited artist is owned, matching how catalog rows are checked
+    owned = {
+        (title, artist)
+        for title, artists in (track_key(track.title, track.artist) for track in tracks)
+        for artist in split_artists(artists)
+    }
+
+    diff = (space.matrix - profile["vector"].astype(np.float32)) * profile["weights"].astype(np.float32)
+    distances = np.einsum('ij,ij->i', diff, diff)
+
+    # Sort only enough candidates to cover the k results plus any skipped ones
+    wanted = min(len(distances), k * 4 + len(owned))
+    candidates = np.argpartition(distances, wanted - 1)[:wanted] if wanted < len(distances) else np.arange(len(distances))
+    candidates = candidates[np.lexsort((candidates, distances[candidates]))]
+
+    results = []
+    for position in candidates:
+        track_id = space.track_ids[position]
+        name, artists = catalog.track_index[track_id][1:3]
+        name = normalize_str(name)
+        if any((name, artist) in owned for artist in split_artists(normalize_str(artists))):
+            continue
+        results.append((track_id, float(np.sqrt(distances[position]))))
+        if len(results) == k:
+            break
+    return results, profile
@@ -0,0 +1,139 @@
+import json
+import os
+import sqlite3
+import threading
+import time
+
+# Returned by get() when nothing usable is stored; None is a valid cached response
+MISSING = object()
+
+DEFAULT_TTLS = {
+    "audio_features": 30 * 24 * 3600,
+    "track": 7 * 24 * 3600,
+    "artist": 24 * 3600,
+}
+
+
+class ResponseCache:
+    """
+    Persistent cache of Spotify API responses in a SQLite file.
+
+    Every worker process opens the same file (WAL mode), so a response
+    fetched by one worker is reused by all of them and survives restarts.
+    Each endpoint has its own TTL; once the table grows past max_entries
+    the oldest rows are trimmed. A cache without a path is disabled.
+    """
+
+    def __init__(self, path=None, ttls=None, max_entries=100000, clock=time.time):
+        self.path = path
+        self.ttls = dict(DEFAULT_TTLS, **(ttls or {}))
+        self.max_entries = max_entries
+        self._clock = clock
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._writes = 0
+        self.hits = 0
+        self.misses = 0
+
+    def configure(self, path=None, ttls=None, max_entries=None):
+        self.path = path
+        self.ttls = dict(DEFAULT_TTLS, **(ttls or {}))
+        if max_entries is not None:
+            self.max_entries = max_entries
+        self._local = threading.local()
+
+    def _connection(self):
+        connection = getattr(self._local, "connection", None)
+        if connection is None or self._local.path != self.path:
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            connection = sqlite3.connect(self.path, timeout=5, isolation_level=None)
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.execute("PRAGMA synchronous=NORMAL")
+            connection.execute(
+                "CREATE TABLE IF NOT EXISTS responses ("
+                " endpoint TEXT NOT NULL, key TEXT NOT NULL, value TEXT NOT NULL,"
+                " stored_at REAL NOT NULL, expires_at REAL NOT NULL,"
+                " PRIMARY KEY (endpoint, key))"
+            )
+            connection.execute("CREATE INDEX IF NOT EXISTS ix_responses_stored_at ON responses (stored_at)")
+            self._local.connection = connection
+            self._local.path = self.path
+        return connection
+
+    def get_many(self, endpoint, keys):
+        """
+        Return {key: response} for the keys with a fresh cached response.
+        """
+        keys = list(dict.fromkeys(keys))
+        if not self.path or not keys:
+            return {}
+        found = {}
+        connection = self._connection()
+        now = self._clock()
+        # Stay well under SQLite's bound-parameter limit
+        for start in range(0, len(keys), 500):
+            chunk = keys[start:start + 500]
+            placeholders = ",".join("?" * len(chunk))
+            rows = connection.execute(
+                f"SELECT key, value FROM responses WHERE endpoint = ? AND key IN ({placeholders}) AND expires_at > ?",
+                [endpoint, *chunk, now]
+            )
+            found.update((key, json.loads(value)) for key, value in rows)
+        with self._lock:
+            self.hits += len(found)
+            self.misses += len(keys) - len(found)
+        return found
+
+    def get(self, endpoint, key):
+        return self.get_many(endpoint, [key]).get(key, MISSING)
+
+    def set_many(self, endpoint, responses):
+        """
+        Store a {key: response} mapping using the endpoint's TTL.
+        """
+        if not self.path or not responses:
+            return
+        now = self._clock()
+        expires_at = now + self.ttls.get(endpoint, 24 * 3600)
+        connection = self._connection()
+        connection.executemany(
+            "INSERT OR REPLACE INTO responses (endpoint, key, value, stored_at, expires_at) VALUES (?, ?, ?, ?, ?)",
+            [(endpoint, key, json.dumps(value), now, expires_at) for key, value in responses.items()]
+        )
+        with self._lock:
+            self._writes += len(responses)
+            trim = self._writes >= max(self.max_entries // 10, 1)
+            if trim:
+                self._writes = 0
+        if trim:
+            self.trim()
+
+    def set(self, endpoint, key, value):
+        self.set_many(endpoint, {key: value})
+
+    def trim(self):
+        """
+        Drop expired rows, then the oldest rows beyond max_entries.
+        """
+        connection = self._connection()
+        connection.execute("DELETE FROM responses WHERE expires_at <= ?", (self._clock(),))
+        connection.execute(
+            "DELETE FROM responses WHERE rowid IN ("
+            " SELECT rowid FROM responses ORDER BY stored_at DESC LIMIT -1 OFFSET ?)",
+            (self.max_entries,)
+        )
+
+    def stats(self):
+        entries = 0
+        if self.path:
+            entries = self._connection().execute("SELECT COUNT(*) FROM responses").fetchone()[0]
+        with self._lock:
+            return {
+                "enabled": bool(self.path),
+                "entries": entries,
+                "max_entries": self.max_entries,
+                "hits": self.hits,
+                "misses": self.misses,
+            }
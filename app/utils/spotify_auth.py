@@ -1,158 +1,447 @@
 import os
-import pandas as pd
+import copy
 import difflib
-import unicodedata
-import re
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, wait
+import numpy as np
 from dotenv import load_dotenv
-import spotipy
-from spotipy.oauth2 import SpotifyClientCredentials
+from app.utils.cache import SingleFlight, TTLCache
+from app.utils.catalog import FEATURE_KEYS, get_catalog, normalize_str
+from app.utils.resilience import CircuitBreaker
+from app.utils.response_cache import ResponseCache
+from app.utils.track_feature_loader import get_track_features_by_ids
 
 # Load environment variables
 load_dotenv()
 
-# Set up Spotipy client
-auth_manager = SpotifyClientCredentials(
-    client_id=os.getenv("SPOTIPY_CLIENT_ID"),
-    client_secret=os.getenv("SPOTIPY_CLIENT_SECRET")
-)
-sp = spotipy.Spotify(auth_manager=auth_manager)
-
-# Load local CSV metadata
-df = pd.read_csv("spotify.csv")
-df.columns = df.columns.str.strip()
-df["track_id"] = df["track_id"].astype(str)
-
-# Unicode-safe normalization for multilingual support
-def normalize_str(s):
-    if pd.isna(s):
-        return ""
-    return unicodedata.normalize('NFKC', str(s)).casefold().strip()
-
-# Preprocess the DataFrame for faster lookups
-def preprocess_dataframe():
-    global df
-    # Create normalized columns for fuzzy matching
-    df['normalized_track_name'] = df['track_name'].apply(normalize_str)
-    df['normalized_artists'] = df['artists'].apply(normalize_str)
-
-    # Extract numerical features for track similarity
-    numerical_features = ['danceability', 'energy', 'valence', 'tempo', 'acousticness', 'liveness']
-    for col in numerical_features:
-        if col in df.columns:
-            df[col] = pd.to_numeric(df[col], errors='coerce')
-
-    print(f"Preprocessed dataframe with {len(df)} rows")
-    return df
+# Spotipy client (pooled, rate limited and retrying; see spotify_client),
+# built by get_spotify() on first use with the settings from init_app
+_spotify = None
+_spotify_lock = threading.Lock()
+_spotify_settings = {}
+
+# Stops calling Spotify after repeated failures; while it is open searches
+# and enrichment fall back to the local catalog straight away
+spotify_breaker = CircuitBreaker()
+
+# Enrichment results keyed by track_id, plus local matches keyed by
+# normalized (title, artist); NO_MATCH entries remember lookups that failed
+enrichment_cache = TTLCache(maxsize=4096, ttl=24 * 3600)
+NO_MATCH = object()
+negative_ttl = 600
+
+# Concurrent searches, enrichments and local matches for the same key share
+# one in-flight computation (keys are namespaced tuples)
+search_flight = SingleFlight()
+
+# Where searches go: "spotify", "local" (catalog only) or "auto" (Spotify,
+# falling back to the catalog when Spotify fails)
+search_backend = "auto"
+
+# Enriched /api/search-tracks results keyed by normalized query and limit
+search_cache = TTLCache(maxsize=1024, ttl=600)
+
+# Raw Spotify API responses, persisted under instance/ and shared by all workers
+response_cache = ResponseCache()
+
+# Bounded pool that enrichment fans out on, and the time budget a search
+# gives it; results still pending at the deadline are returned as partial
+enrichment_workers = 8
+search_deadline = 3.0
+_executor = None
+_executor_lock = threading.Lock()
+
+# Most ids Spotify accepts per request on its multi-id endpoints
+AUDIO_FEATURES_BATCH = 100
+TRACKS_BATCH = 50
+ARTISTS_BATCH = 50
+
+def init_app(app):
+    global negative_ttl, enrichment_workers, search_deadline, search_backend, _executor, _spotify_settings
+    response_cache.configure(
+        path=app.config.get('SPOTIFY_CACHE_PATH'),
+        ttls=app.config.get('SPOTIFY_CACHE_TTLS'),
+        max_entries=app.config.get('SPOTIFY_CACHE_MAX_ENTRIES')
+    )
+    enrichment_cache.configure(
+        maxsize=app.config.get('ENRICHMENT_CACHE_SIZE'),
+        ttl=app.config.get('ENRICHMENT_CACHE_TTL')
+    )
+    negative_ttl = app.config.get('ENRICHMENT_NEGATIVE_TTL', negative_ttl)
+    search_backend = app.config.get('SEARCH_BACKEND', search_backend)
+    search_cache.configure(
+        maxsize=app.config.get('SEARCH_CACHE_SIZE'),
+        ttl=app.config.get('SEARCH_CACHE_TTL')
+    )
+    _spotify_settings = dict(
+        pool_size=app.config.get('SPOTIFY_POOL_SIZE', 16),
+        timeout=(app.config.get('SPOTIFY_CONNECT_TIMEOUT', 3.05), app.config.get('SPOTIFY_READ_TIMEOUT', 5)),
+        rate=app.config.get('SPOTIFY_RATE_LIMIT', 10.0),
+        burst=app.config.get('SPOTIFY_RATE_BURST', 20),
+        max_retries=app.config.get('SPOTIFY_MAX_RETRIES', 3),
+        max_retry_after=app.config.get('SPOTIFY_MAX_RETRY_AFTER', 10)
+    )
+    spotify_breaker.configure(
+        failure_threshold=app.config.get('SPOTIFY_BREAKER_FAILURES'),
+        reset_timeout=app.config.get('SPOTIFY_BREAKER_RESET_TIMEOUT'),
+        half_open_calls=app.config.get('SPOTIFY_BREAKER_HALF_OPEN_CALLS')
+    )
+    with _spotify_lock:
+        if _spotify is not None:
+            _spotify.configure(**_spotify_settings)
+    search_deadline = app.config.get('SEARCH_ENRICHMENT_DEADLINE', search_deadline)
+    workers = app.config.get('ENRICHMENT_WORKERS', enrichment_workers)
+    with _executor_lock:
+        if _executor is not None and workers != enrichment_workers:
+            _executor.shutdown(wait=False)
+            _executor = None
+        enrichment_workers = workers
+
+def get_spotify():
+    """
+    Return the shared Spotify client, creating it on first use.
+    spotipy is imported here too, so create_app() needs neither the
+    credentials nor the import cost until a request talks to Spotify.
+    """
+    global _spotify
+    if _spotify is None:
+        with _spotify_lock:
+            if _spotify is None:
+                from spotipy.oauth2 import SpotifyClientCredentials
+                from app.utils.spotify_client import SpotifyClient
+                auth_manager = SpotifyClientCredentials(
+                    client_id=os.getenv("SPOTIPY_CLIENT_ID"),
+                    client_secret=os.getenv("SPOTIPY_CLIENT_SECRET")
+                )
+                _spotify = SpotifyClient(auth_manager=auth_manager, breaker=spotify_breaker, **_spotify_settings)
+    return _spotify
+
+def set_spotify(client):
+    """
+    Replace the shared Spotify client (None rebuilds it on next use).
+    """
+    global _spotify
+    with _spotify_lock:
+        _spotify = client
+
+# Shared enrichment thread pool, started on first use
+def get_executor():
+    global _executor
+    if _executor is None:
+        with _executor_lock:
+            if _executor is None:
+                _executor = ThreadPoolExecutor(max_workers=enrichment_workers, thread_name_prefix="enrichment")
+    return _executor
+
+# SequenceMatcher ratio of query against each distinct string, scored once per string
+def similarity_scores(query, strings):
+    matcher = difflib.SequenceMatcher(None, query)
+    scores = {}
+    for s in strings:
+        if s not in scores:
+            matcher.set_seq2(s)
+            scores[s] = matcher.ratio()
+    return scores
+
+# Score candidate catalog rows in one batch, without building DataFrames
+def score_candidates(rows, row_artists, normalized_artist, row_titles=None, normalized_title=None):
+    """
+    Artist score is the best ratio against any artist credited on the row;
+    when titles are given the score is 0.6 * title + 0.4 * artist.
+    Returns (best_row, best_score), ties going to the earliest row.
+    """
+    artist_names = [row_artists[row] for row in rows]
+    artist_similarity = similarity_scores(normalized_artist, (a for names in artist_names for a in names))
+    scores = np.fromiter(
+        (max([artist_similarity[a] for a in names] + [0]) for names in artist_names),
+        dtype=float, count=len(rows)
+    )
+
+    if row_titles is not None:
+        title_similarity = similarity_scores(normalized_title, row_titles)
+        title_scores = np.fromiter((title_similarity[t] for t in row_titles), dtype=float, count=len(rows))
+        scores = (title_scores * 0.6) + (scores * 0.4)
+
+    best = int(np.argmax(scores))
+    return rows[best], float(scores[best])
 
 # Get metadata from CSV directly by track title and artist
 def get_metadata_by_title_artist(title, artist):
+    catalog = get_catalog()
+    df = catalog.df
+    row_artists = catalog.artist_index.row_tokens
     normalized_title = normalize_str(title)
     normalized_artist = normalize_str(artist)
 
-    exact_matches = df[
-        (df['normalized_track_name'] == normalized_title)
-    ]
+    exact_rows = np.flatnonzero((df['normalized_track_name'] == normalized_title).to_numpy())
 
-    if not exact_matches.empty:
-        def artist_match_score(csv_artists):
-            artist_list = re.split(r'[;&,]', normalize_str(csv_artists))
-            return max([
-                difflib.SequenceMatcher(None, normalized_artist, a.strip()).ratio()
-                for a in artist_list
-            ] + [0])
+    if len(exact_rows):
+        best_row, artist_score = score_candidates(exact_rows, row_artists, normalized_artist)
 
-        exact_matches['artist_score'] = exact_matches['normalized_artists'].apply(artist_match_score)
-        best_match = exact_matches.sort_values('artist_score', ascending=False).iloc[0]
+        if artist_score > 0.7:
+            print(f"Found exact title match with artist score {artist_score}")
+            return df.iloc[best_row]
 
-        if best_match['artist_score'] > 0.7:
-            print(f"Found exact title match with artist score {best_match['artist_score']}")
-            return best_match
-
-    possible_titles = difflib.get_close_matches(
+    possible_titles = catalog.title_index.close_matches(
         normalized_title,
-        df['normalized_track_name'].unique(),
         n=10,
         cutoff=0.7
     )
 
     if possible_titles:
-        candidates = df[df['normalized_track_name'].isin(possible_titles)]
-
-        def combined_score(row):
-            title_score = difflib.SequenceMatcher(None, normalized_title, row['normalized_track_name']).ratio()
-            artist_list = re.split(r'[;&,]', row['normalized_artists'])
-            artist_score = max([
-                difflib.SequenceMatcher(None, normalized_artist, a.strip()).ratio()
-                for a in artist_list
-            ] + [0])
-            return (title_score * 0.6) + (artist_score * 0.4)
-
-        candidates['match_score'] = candidates.apply(combined_score, axis=1)
-        best_match = candidates.sort_values('match_score', ascending=False).iloc[0]
-        if best_match['match_score'] > 0.7:
-            print(f"Found fuzzy match with score {best_match['match_score']}: {best_match['track_name']} by {best_match['artists']}")
+        candidate_rows = np.flatnonzero(df['normalized_track_name'].isin(possible_titles).to_numpy())
+        best_row, match_score = score_candidates(
+            candidate_rows, row_artists, normalized_artist,
+            row_titles=df['normalized_track_name'].iloc[candidate_rows].tolist(),
+            normalized_title=normalized_title
+        )
+        if match_score > 0.7:
+            best_match = df.iloc[best_row]
+            print(f"Found fuzzy match with score {match_score}: {best_match['track_name']} by {best_match['artists']}")
             return best_match
 
-    artist_matches = df[df['normalized_artists'].str.contains(normalized_artist, regex=False)]
-    if not artist_matches.empty:
-        if 'popularity' in artist_matches.columns:
-            best_match = artist_matches.sort_values('popularity', ascending=False).iloc[0]
+    artist_rows = catalog.artist_index.rows_containing(normalized_artist)
+    if len(artist_rows):
+        if 'popularity' in df.columns:
+            best_row = artist_rows[np.argmax(df['popularity'].to_numpy()[artist_rows])]
         else:
-            best_match = artist_matches.iloc[0]
+            best_row = artist_rows[0]
+        best_match = df.iloc[best_row]
         print(f"Found fallback match by artist: {best_match['track_name']}")
         return best_match
 
     print("No suitable match found in local data")
     return None
 
+# Multi-id Spotify API call through the persistent response cache
+def cached_spotify_batch(endpoint, ids, fetch, batch_size):
+    """
+    Return {id: response} for ids, requesting only the ids missing from the
+    response cache, batch_size at a time. fetch(chunk) must return the
+    responses for chunk in the same order.
+    """
+    ids = list(dict.fromkeys(ids))
+    responses = response_cache.get_many(endpoint, ids)
+    missing = [i for i in ids if i not in responses]
+    for start in range(0, len(missing), batch_size):
+        chunk = missing[start:start + batch_size]
+        fetched = dict(zip(chunk, fetch(chunk)))
+        response_cache.set_many(endpoint, fetched)
+        responses.update(fetched)
+    return responses
+
+# Local title/artist match, cached by normalized title and artist
+def match_title_artist(title, artist):
+    key = ("title", normalize_str(title), normalize_str(artist))
+    cached = enrichment_cache.get(key)
+    if cached is NO_MATCH:
+        return None
+    if cached is not None:
+        return dict(cached)
+
+    metadata, _ = search_flight.do(key, _match_title_artist_uncached, key, title, artist)
+    return dict(metadata) if metadata is not None else None
+
+def _match_title_artist_uncached(key, title, artist):
+    csv_match = get_metadata_by_title_artist(title, artist)
+    if csv_match is None:
+        enrichment_cache.set(key, NO_MATCH, ttl=negative_ttl)
+        return None
+    metadata = extract_metadata(csv_match)
+    enrichment_cache.set(key, metadata)
+    return metadata
+
 # Enhanced enrichment function with multiple fallback strategies
 def enrich_metadata(track_id, fallback_title=None, fallback_artist=None):
     print(f"Trying enrichment for track ID: {track_id}")
+    metadata, shared = search_flight.do(
+        ("enrich", track_id, fallback_title, fallback_artist),
+        lambda: enrich_many([{"id": track_id, "title": fallback_title, "artist": fallback_artist}])[0]
+    )
+    return dict(metadata) if shared else metadata
+
+# Batch enrichment: cache, local catalog, Spotify multi-id endpoints, then fuzzy matching
+def enrich_many(tracks, timeout=None):
+    """
+    Enrich a list of {"id", "title", "artist", "artist_id"} dicts (all but
+    "id" optional) and return their metadata in the same order.
+    Catalog and cache hits cost no requests; the remaining ids are resolved
+    with one audio_features call per 100 ids and one artists call per 50.
+
+    The Spotify requests and the per-track fuzzy matches run on the shared
+    thread pool. With a timeout (seconds), tracks still unresolved when it
+    runs out get default metadata flagged "partial": True; the work keeps
+    running in the background and fills the caches for the next request.
+    """
+    deadline = None if timeout is None else time.monotonic() + timeout
+    results = [None] * len(tracks)
+    pending = []
+    for position, track in enumerate(tracks):
+        track_id = track.get("id")
+        cached = enrichment_cache.get(("track", track_id)) if track_id else None
+        if cached is NO_MATCH:
+            results[position] = generate_default_metadata()
+        elif cached is not None:
+            results[position] = dict(cached)
+        else:
+            pending.append(position)
+
+    pending_ids = list(dict.fromkeys(tracks[p]["id"] for p in pending if tracks[p].get("id")))
+    found, missing = get_track_features_by_ids(pending_ids)
+    resolved = {track_id: catalog_metadata(features) for track_id, features in found.items()}
+    failed = set()
+    timed_out = set()
+
+    api_ids = [track_id for track_id in missing if len(track_id) > 8]
+    if api_ids and spotify_breaker.state == CircuitBreaker.OPEN:
+        # Spotify is down: match locally and don't cache the misses
+        failed = set(api_ids)
+    elif api_ids:
+        artist_ids = {
+            tracks[p]["id"]: tracks[p]["artist_id"]
+            for p in pending if tracks[p].get("id") in api_ids and tracks[p].get("artist_id")
+        }
+        future = get_executor().submit(fetch_spotify_metadata, api_ids, artist_ids)
+        if wait([future], timeout=_remaining(deadline)).done:
+            api_resolved, failed = future.result()
+            resolved.update(api_resolved)
+        else:
+            print(f"Spotify enrichment missed the deadline for {len(api_ids)} tracks")
+            timed_out.update(api_ids)
+
+    # Local fuzzy matches for whatever is left, one task per distinct title/artist
+    matches = {}
+    for position in pending:
+        track = tracks[position]
+        track_id = track.get("id")
+        if track_id in resolved or track_id in timed_out:
+            continue
+        if track.get("title") and track.get("artist"):
+            key = (track["title"], track["artist"])
+            if key not in matches:
+                matches[key] = get_executor().submit(match_title_artist, *key)
+    if matches:
+        wait(matches.values(), timeout=_remaining(deadline))
+
+    for position in pending:
+        track = tracks[position]
+        track_id = track.get("id")
+        metadata = resolved.get(track_id) if track_id else None
+        future = matches.get((track.get("title"), track.get("artist")))
+        if metadata is None and future is not None and future.done():
+            metadata = future.result()
+        elif metadata is None and (track_id in timed_out or future is not None):
+            results[position] = {**generate_default_metadata(), "partial": True}
+            continue
+
+        if track_id and track_id not in failed:
+            if metadata is None:
+                enrichment_cache.set(("track", track_id), NO_MATCH, ttl=negative_ttl)
+            else:
+                enrichment_cache.set(("track", track_id), metadata)
+
+        if metadata is None:
+            print(f"No match found via any method for track ID: {track_id}")
+        results[position] = dict(metadata) if metadata is not None else generate_default_metadata()
+
+    return results
+
+# Seconds left before deadline (None means wait indefinitely)
+def _remaining(deadline):
+    if deadline is None:
+        return None
+    return max(deadline - time.monotonic(), 0)
+
+# Resolve tracks missing from the catalog with Spotify's multi-id endpoints
+def fetch_spotify_metadata(track_ids, artist_ids=None):
+    """
+    Returns (metadata by track id, ids whose lookup hit an API error).
+    artist_ids maps track ids to their primary artist when already known
+    (search results include it), which saves the tracks lookup.
+    """
+    if not track_ids:
+        return {}, set()
+    artist_ids = dict(artist_ids or {})
+
+    try:
+        features = cached_spotify_batch(
+            "audio_features", track_ids,
+            lambda chunk: get_spotify().audio_features(chunk) or [None] * len(chunk),
+            AUDIO_FEATURES_BATCH
+        )
+    except Exception as e:
+        print(f"Error retrieving from Spotify API: {e}")
+        return {}, set(track_ids)
+
+    with_features = [track_id for track_id in track_ids if features.get(track_id)]
+    print(f"Retrieved features for {len(with_features)} of {len(track_ids)} tracks from Spotify API")
+
+    failed = set()
+    genres = {}
+    try:
+        unknown_artists = [track_id for track_id in with_features if track_id not in artist_ids]
+        track_infos = cached_spotify_batch(
+            "track", unknown_artists, lambda chunk: get_spotify().tracks(chunk)['tracks'], TRACKS_BATCH
+        )
+        for track_id, track_info in track_infos.items():
+            if track_info and track_info.get('artists'):
+                artist_ids[track_id] = track_info['artists'][0]['id']
+
+        artist_infos = cached_spotify_batch(
+            "artist", [artist_ids[t] for t in with_features if artist_ids.get(t)],
+            lambda chunk: get_spotify().artists(chunk)['artists'], ARTISTS_BATCH
+        )
+        genres = {
+            artist_id: artist_info.get('genres')
+            for artist_id, artist_info in artist_infos.items() if artist_info
+        }
+    except Exception as e:
+        # Keep the audio features but retry the genre lookup next time
+        print(f"Error retrieving genres from Spotify API: {e}")
+        failed.update(with_features)
+
+    metadata = {
+        track_id: api_metadata(features[track_id], genres.get(artist_ids.get(track_id)))
+        for track_id in with_features
+    }
+    return metadata, failed
+
+# Metadata from a Spotify audio_features response and the artist's genres
+def api_metadata(features, genres=None):
+    duration_ms = features.get("duration_ms", 0)
+    duration_min = round(duration_ms / 60000, 2)
 
-    row = df[df["track_id"] == track_id]
-
-    if not row.empty:
-        print(f"Found direct track_id match: {row.iloc[0]['track_name']}")
-        return extract_metadata(row.iloc[0])
-
-    if track_id and len(track_id) > 8:
-        try:
-            track_features = sp.audio_features(track_id)
-            if track_features and track_features[0]:
-                print(f"Retrieved features directly from Spotify API")
-                duration_ms = track_features[0].get("duration_ms", 0)
-                duration_min = round(duration_ms / 60000, 2)
-
-                api_data = {
-                    "danceability": round(track_features[0].get("danceability", 0), 3),
-                    "energy": round(track_features[0].get("energy", 0), 3),
-                    "liveness": round(track_features[0].get("liveness", 0), 3),
-                    "acousticness": round(track_features[0].get("acousticness", 0), 3),
-                    "valence": round(track_features[0].get("valence", 0), 3),
-                    "tempo": round(track_features[0].get("tempo", 0), 2),
-                    "mode": "Major" if track_features[0].get("mode", 0) == 1 else "Minor",
-                    "duration_ms": duration_ms,
-                    "duration_min": duration_min
-                }
-
-                track_info = sp.track(track_id)
-                if track_info and track_info.get('artists') and len(track_info['artists']) > 0:
-                    artist_id = track_info['artists'][0]['id']
-                    artist_info = sp.artist(artist_id)
-                    if artist_info and 'genres' in artist_info and len(artist_info['genres']) > 0:
-                        api_data["genre"] = artist_info['genres'][0]
-
-                return api_data
-        except Exception as e:
-            print(f"Error retrieving from Spotify API: {e}")
-
-    if fallback_title and fallback_artist:
-        csv_match = get_metadata_by_title_artist(fallback_title, fallback_artist)
-        if csv_match is not None:
-            return extract_metadata(csv_match)
-
-    print("No match found via any method")
-    return generate_default_metadata()
+    api_data = {
+        "danceability": round(features.get("danceability", 0), 3),
+        "energy": round(features.get("energy", 0), 3),
+        "liveness": round(features.get("liveness", 0), 3),
+        "acousticness": round(features.get("acousticness", 0), 3),
+        "valence": round(features.get("valence", 0), 3),
+        "tempo": round(features.get("tempo", 0), 2),
+        "mode": "Major" if features.get("mode", 0) == 1 else "Minor",
+        "duration_ms": duration_ms,
+        "duration_min": duration_min
+    }
+    if genres:
+        api_data["genre"] = genres[0]
+    return api_data
+
+# Metadata from a catalog track index lookup
+def catalog_metadata(features):
+    duration_ms = int(features["duration_ms"])
+    return {
+        "genre": str(features["genre"]).strip() or "Unknown",
+        "duration_ms": duration_ms,
+        "duration_min": round(duration_ms / 60000, 2),
+        "danceability": float(features["danceability"]),
+        "energy": float(features["energy"]),
+        "liveness": float(features["liveness"]),
+        "acousticness": float(features["acousticness"]),
+        "valence": float(features["valence"]),
+        "tempo": float(features["tempo"]),
+        "mode": features["mode"]
+    }
 
 # Extract consistent metadata from a dataframe row
 def extract_metadata(row):
@@ -187,10 +476,30 @@ def generate_default_metadata():
         "mode": "Major"
     }
 
+# Search cache key: case, Unicode form and spacing of the query don't matter
+def search_cache_key(query, limit):
+    return (" ".join(normalize_str(query).split()), limit)
+
 # Combines Spotify API base metadata with local enrichment
 def search_tracks(query, limit=10):
-    results = sp.search(q=query, limit=limit, type='track')
-    tracks = []
+    if search_backend == "local":
+        return search_catalog(query, limit)
+    if search_backend == "auto" and spotify_breaker.state == CircuitBreaker.OPEN:
+        return [dict(track, offline=True) for track in search_catalog(query, limit)]
+    try:
+        # Identical concurrent searches wait for the first one instead of calling Spotify again
+        tracks, shared = search_flight.do(("search",) + search_cache_key(query, limit), _search_tracks, query, limit)
+    except Exception as e:
+        if search_backend != "auto":
+            raise
+        print(f"Spotify search failed, searching the local catalog instead: {e}")
+        return [dict(track, offline=True) for track in search_catalog(query, limit)]
+    return copy.deepcopy(tracks) if shared else tracks
+
+def _search_tracks(query, limit):
+    results = get_spotify().search(q=query, limit=limit, type='track')
+    bases = []
+    lookups = []
 
     for item in results.get('tracks', {}).get('items', []):
         track_id = item.get('id', '')
@@ -200,27 +509,66 @@ def search_tracks(query, limit=10):
         images = item['album'].get('images') if item.get('album') else []
         image_url = images[0]['url'] if images else ''
 
-        enriched = enrich_metadata(track_id, fallback_title=name, fallback_artist=artist)
-        print(f"Enriched result for '{name}' by '{artist}':", enriched)
-
-        base = {
+        bases.append({
             'id': track_id,
             'name': name,
             'artist': artist,
             'album': album,
             'image': image_url
-        }
+        })
+        lookups.append({
+            'id': track_id,
+            'title': name,
+            'artist': artist,
+            'artist_id': item['artists'][0].get('id') if item.get('artists') else None
+        })
+
+    # Enrich every result together so Spotify is hit once per endpoint, not per track,
+    # and bound the wait so a slow Spotify cannot stall the search
+    tracks = []
+    for base, enriched in zip(bases, enrich_many(lookups, timeout=search_deadline)):
+        print(f"Enriched result for '{base['name']}' by '{base['artist']}':", enriched)
         full_track = {**base, **enriched}
 
         if 'duration_ms' in full_track:
-            ms = full_track['duration_ms']
-            minutes = int(ms / 60000)
-            seconds = int((ms % 60000) / 1000)
-            full_track['duration'] = f"{minutes}:{seconds:02d}"
+            full_track['duration'] = format_duration(full_track['duration_ms'])
 
         tracks.append(full_track)
 
     return tracks
 
-# Initialize data preprocessing when module loads
-preprocess_dataframe()
+# "m:ss" display string for a duration in milliseconds
+def format_duration(ms):
+    minutes = int(ms / 60000)
+    seconds = int((ms % 60000) / 1000)
+    return f"{minutes}:{seconds:02d}"
+
+# Offline search over the local catalog, returning the same shape as search_tracks
+def search_catalog(query, limit=10):
+    catalog = get_catalog()
+    track_ids = catalog.df['track_id']
+    tracks = []
+    seen = set()
+
+    for row in catalog.search_index.search(normalize_str(query)):
+        track_id = str(track_ids.iat[row])
+        if track_id in seen:
+            continue
+        seen.add(track_id)
+
+        features = dict(zip(FEATURE_KEYS, catalog.track_index[track_id]))
+        artists = features['artist'] if isinstance(features['artist'], str) else ''
+        track = {
+            'id': track_id,
+            'name': features['name'] if isinstance(features['name'], str) else '',
+            'artist': artists.split(';')[0].strip() or 'Unknown Artist',
+            'album': features['album'] if isinstance(features['album'], str) else 'Unknown Album',
+            'image': '',
+            **catalog_metadata(features)
+        }
+        track['duration'] = format_duration(track['duration_ms'])
+        tracks.append(track)
+        if len(tracks) == limit:
+            break
+
+    return tracks
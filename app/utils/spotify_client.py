@@ -0,0 +1,203 @@
+"""
+Spotify Web API client with connection pooling, client-side rate limiting,
+Retry-After-aware retries and per-call timeouts.
+"""
+import threading
+import time
+import requests
+import spotipy
+from requests.adapters import HTTPAdapter
+from spotipy.exceptions import SpotifyException
+from urllib3.util.retry import Retry
+from app.utils.resilience import CircuitBreaker, CircuitOpenError
+
+# Statuses worth retrying; anything else is raised straight away
+RETRY_STATUSES = frozenset((429, 500, 502, 503, 504))
+
+
+class LocalRateLimitError(SpotifyException):
+    """
+    Raised when our own token bucket has no token in time. No request was
+    sent, so it says nothing about Spotify's health.
+    """
+
+    def __init__(self, url):
+        super().__init__(429, -1, f"{url}:\n Local rate limit exceeded")
+
+
+class TokenBucket:
+    """
+    Thread-safe token bucket: refills at rate tokens per second up to
+    capacity. pause() empties it until a given time, so a Retry-After seen
+    by one thread holds back every thread sharing the bucket.
+    """
+
+    def __init__(self, rate=10.0, capacity=20, clock=time.monotonic, sleep=time.sleep):
+        self.rate = rate
+        self.capacity = capacity
+        self._clock = clock
+        self._sleep = sleep
+        self._tokens = float(capacity)
+        self._updated = clock()
+        self._paused_until = 0.0
+        self._lock = threading.Lock()
+
+    def _refill(self, now):
+        if now > self._updated:
+            start = max(self._updated, self._paused_until)
+            if now > start:
+                self._tokens = min(self.capacity, self._tokens + (now - start) * self.rate)
+            self._updated = now
+
+    def acquire(self, timeout=None):
+        """
+        Take one token, waiting for a refill if necessary.
+        Returns False if no token is available within timeout seconds.
+        """
+        deadline = None if timeout is None else self._clock() + timeout
+        while True:
+            with self._lock:
+                now = self._clock()
+                self._refill(now)
+                if now >= self._paused_until and self._tokens >= 1:
+                    self._tokens -= 1
+                    return True
+                wait = max(self._paused_until - now, (1 - self._tokens) / self.rate, 0)
+            if deadline is not None and self._clock() + wait > deadline:
+                return False
+            self._sleep(wait)
+
+    def pause(self, seconds):
+        with self._lock:
+            now = self._clock()
+            self._refill(now)
+            self._paused_until = max(self._paused_until, now + seconds)
+            self._tokens = 0.0
+
+
+def build_session(pool_size):
+    """
+    Keep-alive session sized for pool_size concurrent requests. Only
+    connection failures are retried here; status retries happen in
+    SpotifyClient so they can honour Retry-After.
+    """
+    session = requests.Session()
+    adapter = HTTPAdapter(
+        pool_connections=pool_size,
+        pool_maxsize=pool_size,
+        max_retries=Retry(
+            total=2, connect=2, read=False, status=0, redirect=0,
+            backoff_factor=0.1, respect_retry_after_header=False
+        )
+    )
+    session.mount('http://', adapter)
+    session.mount('https://', adapter)
+    return session
+
+
+class SpotifyClient(spotipy.Spotify):
+    """
+    spotipy.Spotify over a pooled session, with every request going through
+    a token bucket sized to the app's quota.
+
+    429 and 5xx responses are retried up to max_retries times, waiting for
+    the Retry-After header when Spotify sends one (and pausing the bucket
+    for all threads) or exponential backoff otherwise. A Retry-After longer
+    than max_retry_after is raised instead of waited out.
+
+    Calls whose retries are exhausted (429/5xx, network errors) count as
+    failures for the circuit breaker; while it is open every call raises
+    CircuitOpenError without touching the network. A call that our own
+    token bucket throttles raises LocalRateLimitError and is not counted.
+    """
+
+    def __init__(self, auth=None, auth_manager=None, pool_size=16, timeout=(3.05, 5),
+                 rate=10.0, burst=20, max_retries=3, max_retry_after=10, backoff_factor=0.3,
+                 breaker=None, clock=time.monotonic, sleep=time.sleep):
+        self._clock = clock
+        self._sleep = sleep
+        self.breaker = breaker or CircuitBreaker(clock=clock)
+        super().__init__(
+            auth=auth,
+            auth_manager=auth_manager,
+            requests_session=build_session(pool_size),
+            requests_timeout=timeout
+        )
+        self.configure(pool_size, timeout, rate, burst, max_retries, max_retry_after, backoff_factor)
+
+    def configure(self, pool_size=16, timeout=(3.05, 5), rate=10.0, burst=20,
+                  max_retries=3, max_retry_after=10, backoff_factor=0.3):
+        if getattr(self, "pool_size", pool_size) != pool_size:
+            self._session.close()
+            self._session = build_session(pool_size)
+        self.pool_size = pool_size
+        self.requests_timeout = timeout
+        self.limiter = TokenBucket(rate, burst, clock=self._clock, sleep=self._sleep)
+        self.max_retries = max_retries
+        self.max_retry_after = max_retry_after
+        self.backoff_factor = backoff_factor
+
+    def _internal_call(self, method, url, payload, params):
+        if not self.breaker.allow():
+            raise CircuitOpenError(f"Spotify circuit is open, not calling {method} {url}")
+        try:
+            result = self._call_with_retries(method, url, payload, params)
+        except LocalRateLimitError:
+            # Throttled by our own limiter before any request went out
+            self.breaker.release()
+            raise
+        except SpotifyException as e:
+            if e.http_status in RETRY_STATUSES:
+                self.breaker.record_failure()
+            else:
+                # The service answered; a 4xx is about the request, not its health
+                self.breaker.record_success()
+            raise
+        except Exception:
+            self.breaker.record_failure()
+            raise
+        self.breaker.record_success()
+        return result
+
+    def _call_with_retries(self, method, url, payload, params):
+        attempt = 0
+        last_error = None
+        while True:
+            if not self.limiter.acquire(timeout=self.max_retry_after):
+                if last_error is not None:
+                    # The retry was throttled locally; report the upstream failure
+                    raise last_error
+                raise LocalRateLimitError(url)
+            try:
+                # spotipy pops content_type out of params, so hand it a copy
+                return super()._internal_call(method, url, payload, dict(params or {}))
+            except SpotifyException as e:
+                if e.http_status not in RETRY_STATUSES or attempt >= self.max_retries:
+                    raise
+                retry_after = self._retry_after(e)
+                if retry_after is not None and retry_after > self.max_retry_after:
+                    raise
+                last_error = e
+            except (requests.exceptions.ConnectionError, requests.exceptions.Timeout) as e:
+                if attempt >= self.max_retries:
+                    raise
+                retry_after = None
+                last_error = e
+
+            attempt += 1
+            if retry_after is not None:
+                # The next acquire() waits it out, along with every other thread
+                print(f"Spotify asked us to retry {method} {url} after {retry_after:.2f}s")
+                self.limiter.pause(retry_after)
+            else:
+                delay = self.backoff_factor * (2 ** (attempt - 1))
+                print(f"Retrying Spotify {method} {url} in {delay:.2f}s (attempt {attempt})")
+                self._sleep(delay)
+
+    @staticmethod
+    def _retry_after(error):
+        value = (error.headers or {}).get("Retry-After")
+        try:
+            return max(float(value), 0.0)
+        except (TypeError, ValueError):
+            return None
@@ -0,0 +1,274 @@
+"""
+In-memory text indexes over the normalized catalog strings.
+"""
+import bisect
+import difflib
+import re
+import numpy as np
+
+# Separators between individual artists in the catalog's artists column
+ARTIST_SEPARATORS = re.compile(r'[;&,]')
+
+# Word tokens for full-text search (Unicode letters and digits)
+TOKEN_PATTERN = re.compile(r'\w+')
+
+# Full-text ranking: a title hit outweighs an artist hit, which outweighs
+# an album hit; a prefix hit counts half as much as a whole-word hit
+FIELD_WEIGHTS = (3.0, 2.0, 1.0)
+PREFIX_WEIGHT = 0.5
+MIN_PREFIX_LENGTH = 2
+
+
+def trigrams(s):
+    """
+    Distinct character trigrams of s, padded so short strings and word
+    boundaries still produce grams ("ab" -> "  a", " ab", "ab ").
+    """
+    if not s:
+        return set()
+    padded = f"  {s} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+def tokenize(s):
+    """
+    Word tokens of an already normalized string.
+    """
+    return TOKEN_PATTERN.findall(s)
+
+
+def split_artists(artists):
+    """
+    Split a normalized artists string into its individual artist names.
+    """
+    return tuple(part.strip() for part in ARTIST_SEPARATORS.split(artists))
+
+
+class TrigramIndex:
+    """
+    Character-trigram inverted index over a list of strings.
+
+    Postings are stored as one int32 array of string ids grouped by trigram,
+    with an offsets array marking where each trigram's group starts.
+    """
+
+    def __init__(self, strings, max_candidates=1000):
+        self.strings = list(strings)
+        self.max_candidates = max_candidates
+        self.lengths = np.fromiter((len(s) for s in self.strings), dtype=np.int32, count=len(self.strings))
+        self.gram_counts = np.zeros(len(self.strings), dtype=np.int32)
+
+        vocabulary = {}
+        gram_ids = []
+        string_ids = []
+        for string_id, s in enumerate(self.strings):
+            grams = trigrams(s)
+            self.gram_counts[string_id] = len(grams)
+            for gram in grams:
+                gram_ids.append(vocabulary.setdefault(gram, len(vocabulary)))
+                string_ids.append(string_id)
+
+        gram_ids = np.asarray(gram_ids, dtype=np.int32)
+        order = np.argsort(gram_ids, kind="stable")
+        self.vocabulary = vocabulary
+        self.postings = np.asarray(string_ids, dtype=np.int32)[order]
+        self.offsets = np.zeros(len(vocabulary) + 1, dtype=np.int64)
+        np.cumsum(np.bincount(gram_ids, minlength=len(vocabulary)), out=self.offsets[1:])
+
+    def candidates(self, word, cutoff=0.7):
+        """
+        Ids of the strings most trigram-similar (Dice coefficient) to word,
+        limited to lengths that can still reach a SequenceMatcher ratio of cutoff.
+        """
+        grams = trigrams(word)
+        groups = [
+            self.postings[self.offsets[gram_id]:self.offsets[gram_id + 1]]
+            for gram_id in (self.vocabulary.get(gram) for gram in grams)
+            if gram_id is not None
+        ]
+        if not groups:
+            return np.empty(0, dtype=np.int64)
+
+        shared = np.bincount(np.concatenate(groups), minlength=len(self.strings))
+        hits = np.flatnonzero(shared)
+
+        # ratio = 2 * matches / (len_a + len_b) <= 2 * min_len / (len_a + len_b)
+        size = len(word)
+        lengths = self.lengths[hits]
+        hits = hits[2 * np.minimum(lengths, size) >= cutoff * (lengths + size)]
+
+        if len(hits) > self.max_candidates:
+            dice = shared[hits] / (self.gram_counts[hits] + len(grams))
+            hits = hits[np.argpartition(dice, -self.max_candidates)[-self.max_candidates:]]
+        return hits
+
+    def close_matches(self, word, n=10, cutoff=0.7):
+        """
+        Drop-in replacement for difflib.get_close_matches(word, strings, n, cutoff)
+        that only scores the trigram candidates instead of every string.
+        """
+        possibilities = [self.strings[i] for i in self.candidates(word, cutoff)]
+        return difflib.get_close_matches(word, possibilities, n=n, cutoff=cutoff)
+
+
+class ArtistTokenIndex:
+    """
+    Individual artist name -> catalog row ids, split once at load.
+
+    row_tokens[row] holds the artist names of each catalog row, so scoring
+    code never has to re-split the artists column.
+    """
+
+    def __init__(self, normalized_artists):
+        self.artists = list(normalized_artists)
+        self.row_tokens = []
+        postings = {}
+        for row, artists in enumerate(self.artists):
+            # Reuse one string object per artist name across all of its rows
+            tokens = tuple(
+                postings.setdefault(token, (token, []))[0]
+                for token in split_artists(artists)
+            )
+            self.row_tokens.append(tokens)
+            for token in set(tokens):
+                postings[token][1].append(row)
+
+        self.postings = {
+            token: np.asarray(rows, dtype=np.int64)
+            for token, (_, rows) in postings.items()
+        }
+        self.tokens = list(self.postings)
+
+    def rows_containing(self, artist):
+        """
+        Sorted row ids whose artists string contains the normalized artist,
+        like Series.str.contains(artist, regex=False) but scanning the
+        distinct artist names instead of every catalog row.
+        """
+        parts = [part for part in split_artists(artist) if part]
+        if not parts:
+            # Only separators or whitespace: no name to look up, so scan the rows
+            return np.asarray([row for row, artists in enumerate(self.artists) if artist in artists], dtype=np.int64)
+
+        matched = None
+        for part in parts:
+            groups = [self.postings[token] for token in self.tokens if part in token]
+            rows = np.unique(np.concatenate(groups)) if groups else np.empty(0, dtype=np.int64)
+            matched = rows if matched is None else np.intersect1d(matched, rows, assume_unique=True)
+
+        if parts != [artist]:
+            # The query has separators or padding, which the tokens lack; keep
+            # only the rows whose artists string contains the whole query
+            matched = np.asarray([row for row in matched if artist in self.artists[row]], dtype=np.int64)
+        return matched
+
+
+class TokenIndex:
+    """
+    Word token -> row ids inverted index over one text column.
+
+    Terms are kept sorted and their postings stored contiguously in term
+    order, so all the terms sharing a prefix form a single postings slice.
+    """
+
+    def __init__(self, strings):
+        vocabulary = {}
+        term_ids = []
+        rows = []
+        for row, s in enumerate(strings):
+            for token in set(tokenize(s)):
+                term_ids.append(vocabulary.setdefault(token, len(vocabulary)))
+                rows.append(row)
+
+        self.terms = sorted(vocabulary)
+        rank = np.empty(len(vocabulary), dtype=np.int64)
+        rank[[vocabulary[term] for term in self.terms]] = np.arange(len(self.terms))
+        term_ranks = rank[np.asarray(term_ids, dtype=np.int64)]
+        order = np.argsort(term_ranks, kind="stable")
+        self.postings = np.asarray(rows, dtype=np.int32)[order]
+        self.offsets = np.zeros(len(self.terms) + 1, dtype=np.int64)
+        np.cumsum(np.bincount(term_ranks, minlength=len(self.terms)), out=self.offsets[1:])
+
+    def exact(self, token):
+        """Rows containing token as a whole word."""
+        i = bisect.bisect_left(self.terms, token)
+        if i < len(self.terms) and self.terms[i] == token:
+            return self.postings[self.offsets[i]:self.offsets[i + 1]]
+        return self.postings[:0]
+
+    def prefix(self, token):
+        """Rows containing a word that starts with token (may repeat rows)."""
+        lo = bisect.bisect_left(self.terms, token)
+        hi = bisect.bisect_left(self.terms, token + "\U0010ffff")
+        return self.postings[self.offsets[lo]:self.offsets[hi]]
+
+
+class CatalogSearchIndex:
+    """
+    Full-text search over normalized title, artists and album columns.
+
+    Every query token must match some field, as a whole word or as a word
+    prefix. Prefixes need MIN_PREFIX_LENGTH characters, except for the last
+    token, which the user may still be typing. Rows are ranked by their
+    summed FIELD_WEIGHTS score, then by popularity, then by row order.
+    """
+
+    def __init__(self, titles, artists, albums, popularity):
+        self.fields = (TokenIndex(titles), TokenIndex(artists), TokenIndex(albums))
+        self.popularity = np.asarray(popularity, dtype=np.float64)
+
+    def search(self, query):
+        """
+        Matching row ids for a normalized query, best first.
+        """
+        words = tokenize(query)
+        if not words:
+            return np.empty(0, dtype=np.int64)
+        tokens, typing = list(dict.fromkeys(words)), words[-1]
+
+        size = len(self.popularity)
+        total = np.zeros(size, dtype=np.float32)
+        matched = np.ones(size, dtype=bool)
+        for token in tokens:
+            score = np.zeros(size, dtype=np.float32)
+            for field, weight in zip(self.fields, FIELD_WEIGHTS):
+                if len(token) >= MIN_PREFIX_LENGTH or token == typing:
+                    rows = field.prefix(token)
+                    score[rows] = np.maximum(score[rows], weight * PREFIX_WEIGHT)
+                rows = field.exact(token)
+                score[rows] = np.maximum(score[rows], weight)
+            total += score
+            matched &= score > 0
+
+        rows = np.flatnonzero(matched)
+        return rows[np.lexsort((rows, -self.popularity[rows], -total[rows]))]
+
+
+class PrefixIndex:
+    """
+    Sorted array of normalized keys for typeahead completion.
+
+    The keys starting with a prefix form one contiguous range, found with
+    two binary searches; the best-scored entries of that range are returned.
+    """
+
+    def __init__(self, keys, labels, kinds, scores):
+        order = sorted(range(len(keys)), key=keys.__getitem__)
+        self.keys = [keys[i] for i in order]
+        self.labels = [labels[i] for i in order]
+        self.kinds = [kinds[i] for i in order]
+        self.scores = np.asarray(scores, dtype=np.float64)[order]
+
+    def complete(self, prefix, k=8):
+        """
+        Up to k (label, kind) pairs whose key starts with prefix, highest
+        score first (ties in key order).
+        """
+        lo = bisect.bisect_left(self.keys, prefix)
+        hi = bisect.bisect_left(self.keys, prefix + "\U0010ffff", lo)
+        if hi - lo > k:
+            top = lo + np.argpartition(-self.scores[lo:hi], k - 1)[:k]
+        else:
+            top = np.arange(lo, hi)
+        top = sorted(top.tolist(), key=lambda i: (-self.scores[i], i))
+        return [(self.labels[i], self.kinds[i]) for i in top]
@@ -1,33 +1,27 @@
-import pandas as pd
+from app.utils.catalog import FEATURE_KEYS, build_track_index, get_catalog
 
-# Load the full CSV just once at import
-df = pd.read_csv("spotify.csv")
-
-# Ensure clean column names and types
-df.columns = df.columns.str.strip()
-df["track_id"] = df["track_id"].astype(str)
-
-def get_track_features_by_id(track_id):
+def get_track_features_by_id(track_id, index=None):
     """
     Return enriched track metadata from local CSV for a given Spotify track ID.
     """
-    row = df[df["track_id"] == track_id]
-    if row.empty:
+    row = (get_catalog().track_index if index is None else index).get(track_id)
+    if row is None:
         return None
+    return dict(zip(FEATURE_KEYS, row))
 
-    row_data = row.iloc[0]
-    return {
-        "id": row_data["track_id"],
-        "name": row_data["track_name"],
-        "artist": row_data["artists"],
-        "album": row_data["album_name"],
-        "genre": row_data["track_genre"],
-        "duration_ms": int(row_data["duration_ms"]),
-        "danceability": round(row_data["danceability"], 3),
-        "energy": round(row_data["energy"], 3),
-        "liveness": round(row_data["liveness"], 3),
-        "acousticness": round(row_data["acousticness"], 3),
-        "valence": round(row_data["valence"], 3),
-        "tempo": round(row_data["tempo"], 2),
-        "mode": "Major" if row_data["mode"] == 1 else "Minor"
-    }
+def get_track_features_by_ids(track_ids, index=None):
+    """
+    Batch version of get_track_features_by_id.
+    Returns a (found, missing) pair: found maps each matched ID to its
+    metadata, missing lists the IDs with no catalog row, in input order.
+    """
+    index = get_catalog().track_index if index is None else index
+    found = {}
+    missing = []
+    for track_id in dict.fromkeys(track_ids):
+        row = index.get(track_id)
+        if row is None:
+            missing.append(track_id)
+        else:
+            found[track_id] = dict(zip(FEATURE_KEYS, row))
+    return found, missing
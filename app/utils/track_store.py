@@ -0,0 +1,228 @@
+"""
+Set-based Track, UserTrack and PlaylistTrack writes for the playlist endpoints.
+"""
+import logging
+import sqlalchemy as sa
+from app.models import db, Track, UserTrack, Playlist, PlaylistTrack
+
+logger = logging.getLogger(__name__)
+
+# (title, artist) pairs per IN query; at two bound parameters each this
+# stays under SQLite's historical 999-variable limit
+LOOKUP_CHUNK = 450
+
+FEATURE_FIELDS = ("tempo", "danceability", "energy", "liveness", "acousticness", "valence")
+
+
+def chunked(items, size):
+    for start in range(0, len(items), size):
+        yield items[start:start + size]
+
+
+def parse_track(song):
+    """
+    Track column values for one submitted track dict, or None when it has
+    no title or artist. Values that fail to convert fall back to defaults.
+    """
+    title = song.get("title") or song.get("name")
+    artist = song.get("artist")
+    if not title or not artist:
+        return None
+
+    try:
+        duration = int(song.get("duration_ms", 0))
+        features = {
+            field: float(song.get(field)) if song.get(field) is not None else None
+            for field in FEATURE_FIELDS
+        }
+    except (ValueError, TypeError) as e:
+        logger.warning(f"Type conversion error for track {title}: {str(e)}")
+        duration = 0
+        features = dict.fromkeys(FEATURE_FIELDS)
+
+    return {
+        "title": title,
+        "artist": artist,
+        "genre": song.get("genre"),
+        "mode": song.get("mode"),
+        "duration_ms": duration,
+        **features
+    }
+
+
+def find_tracks(keys):
+    """
+    {(title, artist): track_id} for the keys that exist, using chunked
+    tuple IN queries; the oldest track wins when a pair is duplicated.
+    """
+    keys = list(keys)
+    track_ids = {}
+    for chunk in chunked(keys, LOOKUP_CHUNK):
+        rows = db.session.execute(
+            sa.select(Track.id, Track.title, Track.artist)
+            .where(sa.tuple_(Track.title, Track.artist).in_(chunk))
+            .order_by(Track.id)
+        )
+        for track_id, title, artist in rows:
+            track_ids.setdefault((title, artist), track_id)
+    return track_ids
+
+
+def upsert_insert(model):
+    """
+    INSERT for model with the dialect's ON CONFLICT support, or None when
+    the database has no ON CONFLICT clause.
+    """
+    dialect = db.session.get_bind().dialect.name
+    if dialect == "sqlite":
+        from sqlalchemy.dialects.sqlite import insert
+    elif dialect == "postgresql":
+        from sqlalchemy.dialects.postgresql import insert
+    else:
+        return None
+    return insert(model)
+
+
+def get_or_create_track(spec, user_id):
+    """
+    Id of the track matching spec's (title, artist), creating it if needed.
+    """
+    key = (spec["title"], spec["artist"])
+    track_id = find_tracks([key]).get(key)
+    if track_id is not None:
+        return track_id
+
+    stmt = upsert_insert(Track)
+    if stmt is None:
+        return get_or_create_tracks([spec], user_id)[key]
+    # If a concurrent request created the track since the lookup, the no-op
+    # update makes RETURNING yield its id instead of failing
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[Track.title, Track.artist],
+        set_={"title": stmt.excluded.title}
+    ).returning(Track.id)
+    return db.session.scalars(stmt, [dict(spec, user_id=user_id)]).one()
+
+
+def get_or_create_tracks(specs, user_id):
+    """
+    Return {(title, artist): track_id} for every track in specs, creating
+    the missing ones with a single executemany INSERT. The first spec wins
+    when a track is submitted twice.
+    """
+    first_specs = {}
+    for spec in specs:
+        first_specs.setdefault((spec["title"], spec["artist"]), spec)
+
+    # Existing tracks are looked up rather than upserted: NOT NULL columns
+    # are checked before ON CONFLICT, so a resubmitted track without a genre
+    # would be rejected instead of matched
+    track_ids = find_tracks(first_specs)
+    missing = [key for key in first_specs if key not in track_ids]
+    if missing:
+        logger.debug(f"Creating {len(missing)} new tracks")
+        rows = [dict(first_specs[key], user_id=user_id) for key in missing]
+        stmt = upsert_insert(Track)
+        if stmt is None:
+            stmt = sa.insert(Track)
+        else:
+            # Tracks a concurrent import created since the lookup are skipped
+            # by the unique (title, artist) index and read back below
+            stmt = stmt.on_conflict_do_nothing(index_elements=[Track.title, Track.artist])
+        # No RETURNING here: SQLite cannot return ids for an executemany in
+        # order, so the new ids are read back with the same IN lookup
+        db.session.execute(stmt, rows)
+        track_ids.update(find_tracks(missing))
+    return track_ids
+
+
+def insert_playlist_tracks(playlist_id, track_ids):
+    """
+    Link track_ids (duplicates dropped) to a playlist in one executemany.
+    """
+    rows = [{"playlist_id": playlist_id, "track_id": track_id} for track_id in dict.fromkeys(track_ids)]
+    if rows:
+        db.session.execute(sa.insert(PlaylistTrack), rows)
+    return len(rows)
+
+
+def find_tracks_by_id(track_ids):
+    """
+    {track_id: spec} (title, artist and duration_ms) for the ids that exist.
+    """
+    specs = {}
+    for chunk in chunked(list(dict.fromkeys(track_ids)), LOOKUP_CHUNK * 2):
+        rows = db.session.execute(
+            sa.select(Track.id, Track.title, Track.artist, Track.duration_ms)
+            .where(Track.id.in_(chunk))
+        )
+        for track_id, title, artist, duration in rows:
+            specs[track_id] = {"title": title, "artist": artist, "duration_ms": duration or 0}
+    return specs
+
+
+def playlist_track_ids(playlist_id, track_ids):
+    """
+    The subset of track_ids already linked to the playlist.
+    """
+    linked = set()
+    for chunk in chunked(list(dict.fromkeys(track_ids)), LOOKUP_CHUNK * 2):
+        linked.update(db.session.scalars(
+            sa.select(PlaylistTrack.track_id)
+            .where(PlaylistTrack.playlist_id == playlist_id, PlaylistTrack.track_id.in_(chunk))
+        ))
+    return linked
+
+
+def delete_playlist_tracks(playlist_id, track_ids):
+    """
+    Unlink track_ids from a playlist with one DELETE per chunk.
+    """
+    removed = 0
+    for chunk in chunked(list(dict.fromkeys(track_ids)), LOOKUP_CHUNK * 2):
+        removed += db.session.execute(
+            sa.delete(PlaylistTrack)
+            .where(PlaylistTrack.playlist_id == playlist_id, PlaylistTrack.track_id.in_(chunk))
+        ).rowcount
+    return removed
+
+
+def bump_playlist_version(playlist_id):
+    """
+    Mark a playlist as changed so cached copies (ETags) are invalidated.
+    """
+    db.session.execute(
+        sa.update(Playlist)
+        .where(Playlist.id == playlist_id)
+        .values(version=Playlist.version + 1)
+    )
+
+
+def add_user_tracks(user_id, specs_by_track_id):
+    """
+    Add the tracks missing from the user's collection, given as
+    {track_id: spec}, with one lookup per chunk and one executemany.
+    """
+    existing = set()
+    for chunk in chunked(list(specs_by_track_id), LOOKUP_CHUNK * 2):
+        existing.update(db.session.scalars(
+            sa.select(UserTrack.track_id)
+            .where(UserTrack.user_id == user_id, UserTrack.track_id.in_(chunk))
+        ))
+
+    rows = [
+        {
+            "user_id": user_id,
+            "track_id": track_id,
+            "song": spec["title"],
+            "artist": spec["artist"],
+            "song_duration": spec["duration_ms"],
+            "times_played": 1,
+            "total_ms_listened": spec["duration_ms"]
+        }
+        for track_id, spec in specs_by_track_id.items() if track_id not in existing
+    ]
+    if rows:
+        logger.debug(f"Adding {len(rows)} tracks to user {user_id}'s collection")
+        db.session.execute(sa.insert(UserTrack), rows)
+    return len(rows)
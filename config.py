@@ -7,9 +7,37 @@ class Config:
     SQLALCHEMY_TRACK_MODIFICATIONS = False
     WTF_CSRF_ENABLED = True
     SQLALCHEMY_DATABASE_URI = os.getenv('DATABASE_URL') or f"sqlite:///{os.path.join(basedir, 'instance', 'app.db')}"
+    CATALOG_CSV_PATH = os.getenv('CATALOG_CSV_PATH', 'spotify.csv')
+    CATALOG_COMPILED_PATH = os.getenv('CATALOG_COMPILED_PATH') or os.path.join(basedir, 'instance', 'catalog.bin')
+    ENRICHMENT_CACHE_SIZE = int(os.getenv('ENRICHMENT_CACHE_SIZE', 4096))
+    ENRICHMENT_CACHE_TTL = int(os.getenv('ENRICHMENT_CACHE_TTL', 24 * 3600))
+    ENRICHMENT_NEGATIVE_TTL = int(os.getenv('ENRICHMENT_NEGATIVE_TTL', 600))
+    ENRICHMENT_WORKERS = int(os.getenv('ENRICHMENT_WORKERS', 8))
+    SEARCH_ENRICHMENT_DEADLINE = float(os.getenv('SEARCH_ENRICHMENT_DEADLINE', 3.0))
+    SEARCH_BACKEND = os.getenv('SEARCH_BACKEND', 'auto')  # spotify, local or auto (Spotify with local fallback)
+    SEARCH_CACHE_SIZE = int(os.getenv('SEARCH_CACHE_SIZE', 1024))
+    SEARCH_CACHE_TTL = int(os.getenv('SEARCH_CACHE_TTL', 600))
+    SPOTIFY_CACHE_PATH = os.getenv('SPOTIFY_CACHE_PATH') or os.path.join(basedir, 'instance', 'spotify_cache.sqlite3')
+    SPOTIFY_CACHE_TTLS = {
+        'audio_features': 30 * 24 * 3600,  # audio analysis never changes
+        'track': 7 * 24 * 3600,
+        'artist': 24 * 3600,  # genres are re-tagged occasionally
+    }
+    SPOTIFY_CACHE_MAX_ENTRIES = int(os.getenv('SPOTIFY_CACHE_MAX_ENTRIES', 100000))
+    SPOTIFY_POOL_SIZE = int(os.getenv('SPOTIFY_POOL_SIZE', 16))
+    SPOTIFY_CONNECT_TIMEOUT = float(os.getenv('SPOTIFY_CONNECT_TIMEOUT', 3.05))
+    SPOTIFY_READ_TIMEOUT = float(os.getenv('SPOTIFY_READ_TIMEOUT', 5))
+    SPOTIFY_RATE_LIMIT = float(os.getenv('SPOTIFY_RATE_LIMIT', 10))  # requests per second
+    SPOTIFY_RATE_BURST = int(os.getenv('SPOTIFY_RATE_BURST', 20))
+    SPOTIFY_MAX_RETRIES = int(os.getenv('SPOTIFY_MAX_RETRIES', 3))
+    SPOTIFY_MAX_RETRY_AFTER = float(os.getenv('SPOTIFY_MAX_RETRY_AFTER', 10))  # longer waits are raised
+    SPOTIFY_BREAKER_FAILURES = int(os.getenv('SPOTIFY_BREAKER_FAILURES', 5))  # consecutive failures before opening
+    SPOTIFY_BREAKER_RESET_TIMEOUT = float(os.getenv('SPOTIFY_BREAKER_RESET_TIMEOUT', 30))
+    SPOTIFY_BREAKER_HALF_OPEN_CALLS = int(os.getenv('SPOTIFY_BREAKER_HALF_OPEN_CALLS', 1))
 
 class TestConfig(Config):
     TESTING = True
     SQLALCHEMY_DATABASE_URI = 'sqlite:///:memory:'
     SQLALCHEMY_TRACK_MODIFICATIONS = False
-    WTF_CSRF_ENABLED = False
\ No newline at end of file
+    WTF_CSRF_ENABLED = False
+    SPOTIFY_CACHE_PATH = None
\ No newline at end of file
@@ -0,0 +1,66 @@
+"""Unique (title, artist) index on tracks
+
+Revision ID: 5c1e8a2f9d47
+Revises: 
+Create Date: 2026-10-18 09:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '5c1e8a2f9d47'
+down_revision = None
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    bind = op.get_bind()
+    inspector = sa.inspect(bind)
+    if not inspector.has_table('tracks'):
+        # Nothing to migrate yet; db.create_all() builds the index from the model
+        return
+    if any(index['name'] == 'ix_tracks_title_artist' for index in inspector.get_indexes('tracks')):
+        return
+
+    # Fold duplicate (title, artist) rows into the oldest one before the
+    # unique index can be created
+    duplicates = [
+        {'duplicate_id': duplicate_id, 'keep_id': keep_id}
+        for duplicate_id, keep_id in bind.execute(sa.text(
+            'SELECT t.id, keep.keep_id FROM tracks t '
+            'JOIN (SELECT title, artist, MIN(id) AS keep_id FROM tracks '
+            '      GROUP BY title, artist HAVING COUNT(*) > 1) keep '
+            'ON t.title = keep.title AND t.artist = keep.artist '
+            'WHERE t.id <> keep.keep_id'
+        ))
+    ]
+    if duplicates:
+        bind.execute(sa.text(
+            'INSERT INTO playlist_tracks (playlist_id, track_id) '
+            'SELECT DISTINCT pt.playlist_id, :keep_id FROM playlist_tracks pt '
+            'WHERE pt.track_id = :duplicate_id AND NOT EXISTS ('
+            '    SELECT 1 FROM playlist_tracks existing '
+            '    WHERE existing.playlist_id = pt.playlist_id AND existing.track_id = :keep_id)'
+        ), duplicates)
+        bind.execute(sa.text('DELETE FROM playlist_tracks WHERE track_id = :duplicate_id'), duplicates)
+        bind.execute(sa.text('UPDATE user_tracks SET track_id = :keep_id WHERE track_id = :duplicate_id'), duplicates)
+        # A user who had both copies keeps their oldest entry
+        bind.execute(sa.text(
+            'DELETE FROM user_tracks WHERE track_id = :keep_id AND id NOT IN ('
+            '    SELECT MIN(id) FROM user_tracks WHERE track_id = :keep_id GROUP BY user_id)'
+        ), duplicates)
+        bind.execute(sa.text('DELETE FROM tracks WHERE id = :duplicate_id'), duplicates)
+
+    op.create_index('ix_tracks_title_artist', 'tracks', ['title', 'artist'], unique=True)
+
+
+def downgrade():
+    inspector = sa.inspect(op.get_bind())
+    if not inspector.has_table('tracks'):
+        return
+    if not any(index['name'] == 'ix_tracks_title_artist' for index in inspector.get_indexes('tracks')):
+        return
+    op.drop_index('ix_tracks_title_artist', table_name='tracks')
@@ -0,0 +1,36 @@
+"""Add playlists.version for ETags
+
+Revision ID: 8d3b6f0a2c91
+Revises: 5c1e8a2f9d47
+Create Date: 2026-10-18 09:30:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '8d3b6f0a2c91'
+down_revision = '5c1e8a2f9d47'
+branch_labels = None
+depends_on = None
+
+
+def _has_version_column(inspector):
+    return any(column['name'] == 'version' for column in inspector.get_columns('playlists'))
+
+
+def upgrade():
+    inspector = sa.inspect(op.get_bind())
+    if not inspector.has_table('playlists') or _has_version_column(inspector):
+        return
+    with op.batch_alter_table('playlists') as batch_op:
+        batch_op.add_column(sa.Column('version', sa.Integer(), server_default='1', nullable=False))
+
+
+def downgrade():
+    inspector = sa.inspect(op.get_bind())
+    if not inspector.has_table('playlists') or not _has_version_column(inspector):
+        return
+    with op.batch_alter_table('playlists') as batch_op:
+        batch_op.drop_column('version')
@@ -0,0 +1,34 @@
+"""Index playlists.owner_id for paginated playlist listings
+
+Revision ID: b7e4c1d9a356
+Revises: 8d3b6f0a2c91
+Create Date: 2026-10-18 10:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'b7e4c1d9a356'
+down_revision = '8d3b6f0a2c91'
+branch_labels = None
+depends_on = None
+
+
+def _has_owner_index(inspector):
+    return any(index['name'] == 'ix_playlists_owner_id' for index in inspector.get_indexes('playlists'))
+
+
+def upgrade():
+    inspector = sa.inspect(op.get_bind())
+    if not inspector.has_table('playlists') or _has_owner_index(inspector):
+        return
+    op.create_index('ix_playlists_owner_id', 'playlists', ['owner_id'], unique=False)
+
+
+def downgrade():
+    inspector = sa.inspect(op.get_bind())
+    if not inspector.has_table('playlists') or not _has_owner_index(inspector):
+        return
+    op.drop_index('ix_playlists_owner_id', table_name='playlists')
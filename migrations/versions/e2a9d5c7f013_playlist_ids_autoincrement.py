@@ -0,0 +1,47 @@
+"""Never reuse playlist ids on SQLite
+
+Revision ID: e2a9d5c7f013
+Revises: b7e4c1d9a356
+Create Date: 2026-10-18 11:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'e2a9d5c7f013'
+down_revision = 'b7e4c1d9a356'
+branch_labels = None
+depends_on = None
+
+
+def _table_sql(bind):
+    return bind.execute(sa.text(
+        "SELECT sql FROM sqlite_master WHERE type = 'table' AND name = 'playlists'"
+    )).scalar()
+
+
+def upgrade():
+    # Other databases already never hand out a deleted id again. On SQLite
+    # a plain INTEGER PRIMARY KEY reuses the id of the newest playlist once
+    # it is deleted, which would let a new playlist match the old one's ETag
+    bind = op.get_bind()
+    if bind.dialect.name != 'sqlite':
+        return
+    sql = _table_sql(bind)
+    if sql is None or 'AUTOINCREMENT' in sql.upper():
+        return
+    with op.batch_alter_table('playlists', recreate='always', table_kwargs={'sqlite_autoincrement': True}):
+        pass
+
+
+def downgrade():
+    bind = op.get_bind()
+    if bind.dialect.name != 'sqlite':
+        return
+    sql = _table_sql(bind)
+    if sql is None or 'AUTOINCREMENT' not in sql.upper():
+        return
+    with op.batch_alter_table('playlists', recreate='always', table_kwargs={'sqlite_autoincrement': False}):
+        pass
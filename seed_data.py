@@ -8,8 +8,13 @@ import random
 spotify_df = pd.read_csv("spotify.csv")
 spotify_df.rename(columns={"artists": "artist", "track_genre": "genre"}, inplace=True)
 spotify_df = spotify_df.dropna(subset=["track_name", "artist", "genre", "tempo"])
+# Tracks are unique by (title, artist); the CSV repeats songs across genres
+spotify_df = spotify_df.drop_duplicates(subset=["track_name", "artist"])
 
 def create_track_from_row(row, user_id):
+    existing = Track.query.filter_by(title=row["track_name"], artist=row["artist"]).first()
+    if existing:
+        return existing
     return Track(
         title=row["track_name"],
         artist=row["artist"],
@@ -135,20 +140,7 @@ def seed_marker_account(users):
             ]).sample(n=8)
 
             for _, row in sample_tracks.iterrows():
-                track = Track(
-                    title=row["track_name"],
-                    artist=row["artist"],
-                    genre=row["genre"],
-                    tempo=row["tempo"],
-                    valence=row["valence"],
-                    energy=row["energy"],
-                    acousticness=row["acousticness"],
-                    danceability=row["danceability"],
-                    liveness=row["liveness"],
-                    mode="Major" if row["mode"] == 1 else "Minor",
-                    duration_ms=int(row["duration_ms"]),
-                    user_id=user.id
-                )
+                track = create_track_from_row(row, user.id)
                 db.session.add(track)
                 db.session.flush()
 
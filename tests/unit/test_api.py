@@ -3,6 +3,7 @@
 import pytest
 from app import create_app, db
 from app.models import User, Playlist, Track, PlaylistTrack
+from app.utils.spotify_auth import search_cache
 from config import TestConfig
 from tests.conftest import load_sample_data
 
@@ -66,6 +67,80 @@ def test_get_playlist_details(logged_in_client):
     assert response.status_code == 200
     assert b'Alice Hits' in response.data
 
+def test_get_playlist_conditional_requests(logged_in_client):
+    playlist = Playlist.query.filter_by(name='Alice Hits').first()
+    track = Track.query.filter_by(title='Track B').first()
+    url = f'/api/playlist/{playlist.id}'
+
+    response = logged_in_client.get(url)
+    etag = response.headers['ETag']
+    assert etag.startswith('W/')
+    assert response.headers['Cache-Control'] == 'private, no-cache'
+
+    response = logged_in_client.get(url, headers={'If-None-Match': etag})
+    assert response.status_code == 304
+    assert response.headers['ETag'] == etag
+
+    logged_in_client.post(f'{url}/add-track', json={'track_id': track.id})
+    response = logged_in_client.get(url, headers={'If-None-Match': etag})
+    assert response.status_code == 200
+    assert response.headers['ETag'] != etag
+    assert [t['id'] for t in response.get_json()['playlist']['tracks']] == [track.id]
+
+    etag = response.headers['ETag']
+    logged_in_client.post(url, json={'name': 'Renamed'})
+    assert logged_in_client.get(url, headers={'If-None-Match': etag}).status_code == 200
+
+def test_recreated_playlist_does_not_match_deleted_playlists_etag(logged_in_client):
+    user = User.query.filter_by(username='alice').first()
+    playlist = Playlist(name='Short Lived', owner_id=user.id)
+    db.session.add(playlist)
+    db.session.commit()
+    old_id = playlist.id
+    etag = logged_in_client.get(f'/api/playlist/{old_id}').headers['ETag']
+    logged_in_client.delete(f'/api/playlist/{old_id}')
+
+    replacement = Playlist(name='Replacement', owner_id=user.id)
+    db.session.add(replacement)
+    db.session.commit()
+    assert replacement.id != old_id
+    response = logged_in_client.get(f'/api/playlist/{replacement.id}', headers={'If-None-Match': etag})
+    assert response.status_code == 200
+
+def test_playlist_tracks_are_paginated_by_cursor(logged_in_client):
+    playlist = Playlist.query.filter_by(name='Alice Hits').first()
+    track_ids = sorted(track.id for track in Track.query.all())
+    for track_id in track_ids:
+        db.session.add(PlaylistTrack(playlist_id=playlist.id, track_id=track_id))
+    db.session.commit()
+
+    seen, cursor = [], None
+    while True:
+        url = f'/api/playlist/{playlist.id}?limit=2' + (f'&cursor={cursor}' if cursor else '')
+        data = logged_in_client.get(url).get_json()
+        assert len(data['playlist']['tracks']) <= 2
+        seen += [track['id'] for track in data['playlist']['tracks']]
+        cursor = data['next_cursor']
+        if cursor is None:
+            break
+    assert seen == track_ids
+
+    for cursor in ('abc', '%C2%B2', '-1'):
+        assert logged_in_client.get(f'/api/playlist/{playlist.id}?cursor={cursor}').status_code == 400
+        assert logged_in_client.get(f'/api/playlists?cursor={cursor}').status_code == 400
+
+def test_playlists_are_paginated_by_cursor(logged_in_client):
+    user = User.query.filter_by(username='alice').first()
+    db.session.add_all([Playlist(name=f'Extra {i}', owner_id=user.id) for i in range(3)])
+    db.session.commit()
+    owned = [p.id for p in Playlist.query.filter_by(owner_id=user.id).order_by(Playlist.id)]
+
+    first = logged_in_client.get('/api/playlists?limit=3').get_json()
+    assert [p['id'] for p in first['playlists']] == owned[:3]
+    second = logged_in_client.get(f"/api/playlists?limit=3&cursor={first['next_cursor']}").get_json()
+    assert [p['id'] for p in second['playlists']] == owned[3:]
+    assert second['next_cursor'] is None
+
 def test_edit_playlist_name(logged_in_client):
     playlist = Playlist.query.filter_by(name='Alice Hits').first()
     response = logged_in_client.post(
@@ -95,6 +170,27 @@ def test_add_track_to_playlist(logged_in_client):
     pt = PlaylistTrack.query.filter_by(playlist_id=playlist.id, track_id=track.id).first()
     assert pt is not None
 
+def test_add_track_by_title_reuses_existing_track(logged_in_client):
+    playlist = Playlist.query.filter_by(name='Alice Hits').first()
+    track = Track.query.filter_by(title='Track B', artist='Artist Y').first()
+    count = Track.query.count()
+    response = logged_in_client.post(
+        f'/api/playlist/{playlist.id}/add-track',
+        json={'title': 'Track B', 'artist': 'Artist Y'}
+    )
+    assert response.status_code == 200
+    assert Track.query.count() == count
+    assert PlaylistTrack.query.filter_by(playlist_id=playlist.id, track_id=track.id).first() is not None
+
+    response = logged_in_client.post(
+        f'/api/playlist/{playlist.id}/add-track',
+        json={'title': 'Brand New', 'artist': 'Artist Y', 'genre': 'Rock', 'tempo': 'fast'}
+    )
+    assert response.status_code == 200
+    new_track = Track.query.filter_by(title='Brand New', artist='Artist Y').one()
+    assert new_track.tempo == 0
+    assert PlaylistTrack.query.filter_by(playlist_id=playlist.id, track_id=new_track.id).first() is not None
+
 def test_remove_track_from_playlist(logged_in_client):
     playlist = Playlist.query.filter_by(name='Alice Hits').first()
     track = Track.query.filter_by(title='Track A').first()
@@ -108,6 +204,51 @@ def test_remove_track_from_playlist(logged_in_client):
     assert response.status_code == 200
     assert PlaylistTrack.query.filter_by(playlist_id=playlist.id, track_id=track.id).first() is None
 
+def test_batch_update_playlist_tracks(logged_in_client):
+    playlist = Playlist.query.filter_by(name='Alice Hits').first()
+    track_a = Track.query.filter_by(title='Track A').first()
+    track_b = Track.query.filter_by(title='Track B').first()
+    db.session.add(PlaylistTrack(playlist_id=playlist.id, track_id=track_a.id))
+    db.session.commit()
+
+    response = logged_in_client.post(
+        f'/api/playlist/{playlist.id}/tracks:batch',
+        json={
+            'add': [track_b.id, track_b.id, {'title': 'Batch Song', 'artist': 'Artist Y', 'genre': 'Rock'}],
+            'remove': [track_a.id, 99999]
+        }
+    )
+    assert response.status_code == 200
+    data = response.get_json()
+    new_track = Track.query.filter_by(title='Batch Song').one()
+    assert data['added'] == [track_b.id, new_track.id]
+    assert data['removed'] == [track_a.id]
+    linked = {pt.track_id for pt in PlaylistTrack.query.filter_by(playlist_id=playlist.id)}
+    assert linked == {track_b.id, new_track.id}
+
+    # Already linked tracks are skipped
+    response = logged_in_client.post(f'/api/playlist/{playlist.id}/tracks:batch', json={'add': [track_b.id]})
+    assert response.get_json()['added'] == []
+    assert response.get_json()['skipped'] == [track_b.id]
+
+def test_batch_update_rejects_invalid_entries(logged_in_client):
+    playlist = Playlist.query.filter_by(name='Alice Hits').first()
+    track_b = Track.query.filter_by(title='Track B').first()
+
+    for payload in (
+        {'add': [track_b.id, {'title': 'No Artist'}]},
+        {'add': [99999]},
+        {'remove': ['Track A']},
+        {'add': 'Track B'},
+    ):
+        response = logged_in_client.post(f'/api/playlist/{playlist.id}/tracks:batch', json=payload)
+        assert response.status_code == 400
+    assert PlaylistTrack.query.filter_by(playlist_id=playlist.id).count() == 0
+
+    bob_playlist = Playlist.query.filter_by(name='Bob Vibes').first()
+    response = logged_in_client.post(f'/api/playlist/{bob_playlist.id}/tracks:batch', json={'add': [track_b.id]})
+    assert response.status_code == 404
+
 def test_share_playlist(logged_in_client):
     playlist = Playlist.query.filter_by(name='Alice Hits').first()
     response = logged_in_client.post(
@@ -116,3 +257,85 @@ def test_share_playlist(logged_in_client):
         follow_redirects=True
     )
     assert response.status_code == 200
+
+def test_search_tracks_merges_catalog_features(logged_in_client, monkeypatch):
+    from app.utils import track_feature_loader
+    from app.utils.catalog import get_catalog
+    catalog_id = get_catalog().df["track_id"].iloc[0]
+    search_cache.clear()
+    monkeypatch.setattr('app.routes.upload.search_tracks', lambda query, limit=10: [
+        {'id': catalog_id, 'name': 'Known', 'artist': 'Someone'},
+        {'id': 'not-in-catalog', 'name': 'Unknown', 'artist': 'Nobody', 'genre': 'Unknown'},
+    ])
+    response = logged_in_client.get('/api/search-tracks?query=anything')
+    assert response.status_code == 200
+    known, unknown = response.get_json()
+    assert known['genre'] == track_feature_loader.get_track_features_by_id(catalog_id)['genre']
+    assert unknown['genre'] == 'Unknown'
+
+def test_search_results_are_cached_by_normalized_query(logged_in_client, monkeypatch):
+    calls = []
+
+    def fake_search(query, limit=10):
+        calls.append((query, limit))
+        return [{'id': 'not-in-catalog', 'name': 'Song', 'artist': 'Someone'}]
+
+    search_cache.clear()
+    hits = search_cache.stats()['hits']
+    monkeypatch.setattr('app.routes.upload.search_tracks', fake_search)
+    first = logged_in_client.get('/api/search-tracks?query=Daft%20Punk')
+    second = logged_in_client.get('/api/search-tracks?query=%20daft%20%20punk')
+    other_limit = logged_in_client.get('/api/search-tracks?query=daft%20punk&limit=5')
+
+    assert first.headers['X-Cache'] == 'MISS'
+    assert second.headers['X-Cache'] == 'HIT'
+    assert second.get_json() == first.get_json()
+    assert other_limit.headers['X-Cache'] == 'MISS'
+    assert calls == [('Daft Punk', 10), ('daft punk', 5)]
+    assert logged_in_client.get('/api/metrics').get_json()['search_cache']['hits'] == hits + 1
+
+def test_typeahead_answers_from_catalog(logged_in_client, monkeypatch):
+    from app.utils.catalog import get_catalog
+    monkeypatch.setattr('app.utils.spotify_auth.get_spotify', lambda: pytest.fail("Spotify was called"))
+    df = get_catalog().df
+    title = df['track_name'].iloc[int(df['popularity'].to_numpy().argmax())]
+
+    response = logged_in_client.get(f'/api/typeahead?q={title.upper()}&k=5')
+    assert response.status_code == 200
+    assert {'text': title, 'type': 'track'} in response.get_json()
+    assert logged_in_client.get('/api/typeahead?q=').get_json() == []
+
+def test_similar_tracks_endpoint(logged_in_client):
+    from app.utils.catalog import get_catalog
+    track_id = get_catalog().df['track_id'].iloc[0]
+
+    response = logged_in_client.get(f'/api/tracks/{track_id}/similar?k=3')
+    assert response.status_code == 200
+    similar = response.get_json()['similar']
+    assert len(similar) == 3 and track_id not in {t['id'] for t in similar}
+    assert similar == sorted(similar, key=lambda t: t['distance'])
+    assert logged_in_client.get('/api/tracks/nope/similar').status_code == 404
+
+def test_playlist_recommendations(logged_in_client):
+    playlist = Playlist.query.filter_by(name='Alice Hits').first()
+    assert logged_in_client.get(f'/api/playlist/{playlist.id}/recommendations').get_json()['recommendations'] == []
+
+    for track in Track.query.filter_by(user_id=playlist.owner_id).all():
+        db.session.add(PlaylistTrack(playlist_id=playlist.id, track_id=track.id))
+    db.session.commit()
+    response = logged_in_client.get(f'/api/playlist/{playlist.id}/recommendations?k=5')
+    assert response.status_code == 200
+    data = response.get_json()
+    assert len(data['recommendations']) == 5
+    assert set(data['centroid']) == {'danceability', 'energy', 'valence', 'tempo', 'acousticness', 'liveness'}
+    distances = [t['distance'] for t in data['recommendations']]
+    assert distances == sorted(distances)
+
+    bob_playlist = Playlist.query.filter_by(name='Bob Vibes').first()
+    assert logged_in_client.get(f'/api/playlist/{bob_playlist.id}/recommendations').status_code == 404
+
+def test_metrics_exposes_enrichment_cache(logged_in_client):
+    response = logged_in_client.get('/api/metrics')
+    assert response.status_code == 200
+    stats = response.get_json()['enrichment_cache']
+    assert {'hits', 'misses', 'evictions', 'size', 'maxsize'} <= set(stats)
@@ -0,0 +1,264 @@
+# tests/unit/test_cache.py
+
+import threading
+import time
+import pytest
+from app.utils import spotify_auth
+from app.utils.cache import SingleFlight, TTLCache
+from app.utils.response_cache import MISSING, ResponseCache
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_ttl_cache_evicts_least_recently_used():
+    cache = TTLCache(maxsize=2, ttl=60)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    assert cache.get("a") == 1
+    cache.set("c", 3)
+
+    assert cache.get("b") is None
+    assert cache.get("a") == 1 and cache.get("c") == 3
+    assert cache.stats()["evictions"] == 1
+
+
+def test_ttl_cache_expires_entries():
+    clock = FakeClock()
+    cache = TTLCache(maxsize=10, ttl=60, clock=clock)
+    cache.set("short", "x", ttl=5)
+    cache.set("long", "y")
+
+    clock.now = 30
+    assert cache.get("short") is None
+    assert cache.get("long") == "y"
+    stats = cache.stats()
+    assert (stats["hits"], stats["misses"], stats["expirations"]) == (1, 1, 1)
+
+
+def wait_for(condition, timeout=5):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline
+        time.sleep(0.01)
+
+
+def run_concurrently(target, count):
+    results = [None] * count
+
+    def run(i):
+        results[i] = target()
+
+    threads = [threading.Thread(target=run, args=(i,)) for i in range(count)]
+    for thread in threads:
+        thread.start()
+    return threads, results
+
+
+def test_single_flight_shares_one_call():
+    flight = SingleFlight()
+    release = threading.Event()
+    calls = []
+
+    def compute():
+        calls.append(1)
+        release.wait(5)
+        return {"value": 42}
+
+    threads, results = run_concurrently(lambda: flight.do("key", compute), 5)
+    wait_for(lambda: flight.stats()["shared"] == 4)
+    release.set()
+    for thread in threads:
+        thread.join()
+
+    assert len(calls) == 1
+    assert sorted(shared for _, shared in results) == [False, True, True, True, True]
+    assert all(result == {"value": 42} for result, _ in results)
+    assert flight.stats()["in_flight"] == 0
+
+
+def test_single_flight_shares_errors_then_forgets_them():
+    flight = SingleFlight()
+
+    def fail():
+        raise ValueError("boom")
+
+    with pytest.raises(ValueError):
+        flight.do("key", fail)
+    assert flight.do("key", lambda: "ok") == ("ok", False)
+
+
+class CountingSpotify:
+    """Stands in for the spotipy client and counts API requests per endpoint."""
+
+    def __init__(self, features=None):
+        self.features = features
+        self.requests = {"audio_features": 0, "tracks": 0, "artists": 0}
+
+    @property
+    def calls(self):
+        return self.requests["audio_features"]
+
+    def audio_features(self, track_ids):
+        self.requests["audio_features"] += 1
+        return [self.features for _ in track_ids]
+
+    def tracks(self, track_ids):
+        self.requests["tracks"] += 1
+        return {"tracks": [{"id": t, "artists": [{"id": "artist1"}]} for t in track_ids]}
+
+    def artists(self, artist_ids):
+        self.requests["artists"] += 1
+        return {"artists": [{"id": a, "genres": ["indie"]} for a in artist_ids]}
+
+    def search(self, q, limit=10, type='track'):
+        items = [
+            {"id": f"0000search{i:04d}", "name": f"Song {i}",
+             "artists": [{"name": f"Artist {i}", "id": f"artist{i % 3}"}],
+             "album": {"name": "Album", "images": []}}
+            for i in range(limit)
+        ]
+        return {"tracks": {"items": items}}
+
+
+@pytest.fixture
+def fresh_enrichment_cache(monkeypatch):
+    monkeypatch.setattr(spotify_auth.response_cache, "path", None)
+    spotify_auth.enrichment_cache.clear()
+    yield spotify_auth.enrichment_cache
+    spotify_auth.enrichment_cache.clear()
+
+
+def test_enrichment_is_cached_by_track_id(monkeypatch, fresh_enrichment_cache):
+    fake = CountingSpotify({"danceability": 0.7, "energy": 0.6, "tempo": 101.0, "mode": 1, "duration_ms": 200000})
+    monkeypatch.setattr(spotify_auth, "get_spotify", lambda: fake)
+
+    first = spotify_auth.enrich_metadata("0000notinthecatalog")
+    second = spotify_auth.enrich_metadata("0000notinthecatalog")
+
+    assert first == second
+    assert first["genre"] == "indie"
+    assert fake.calls == 1
+
+
+def test_enrichment_caches_misses(monkeypatch, fresh_enrichment_cache):
+    fake = CountingSpotify(None)
+    monkeypatch.setattr(spotify_auth, "get_spotify", lambda: fake)
+
+    for _ in range(3):
+        assert spotify_auth.enrich_metadata("0000notinthecatalog") == spotify_auth.generate_default_metadata()
+    assert fake.calls == 1
+
+
+def test_search_enrichment_uses_constant_number_of_requests(monkeypatch, fresh_enrichment_cache):
+    fake = CountingSpotify({"danceability": 0.7, "energy": 0.6, "tempo": 101.0, "mode": 1, "duration_ms": 200000})
+    monkeypatch.setattr(spotify_auth, "get_spotify", lambda: fake)
+
+    tracks = spotify_auth.search_tracks("anything", limit=50)
+
+    assert len(tracks) == 50
+    assert all(track["genre"] == "indie" and track["duration"] == "3:20" for track in tracks)
+    # Search results carry artist ids, so no tracks lookup is needed
+    assert fake.requests == {"audio_features": 1, "tracks": 0, "artists": 1}
+
+
+def test_enrich_many_batches_by_endpoint_limits(monkeypatch, fresh_enrichment_cache):
+    fake = CountingSpotify({"danceability": 0.7, "energy": 0.6, "tempo": 101.0, "mode": 1, "duration_ms": 200000})
+    monkeypatch.setattr(spotify_auth, "get_spotify", lambda: fake)
+
+    ids = [f"0000batch{i:04d}" for i in range(120)]
+    results = spotify_auth.enrich_many([{"id": track_id} for track_id in ids + ids[:5]])
+
+    assert len(results) == 125 and results[0] == results[120]
+    assert fake.requests == {"audio_features": 2, "tracks": 3, "artists": 1}
+
+
+class BlockingSearchSpotify(CountingSpotify):
+    """search blocks until released so concurrent callers pile up."""
+
+    def __init__(self, features=None):
+        super().__init__(features)
+        self.release = threading.Event()
+        self.searches = 0
+
+    def search(self, q, limit=10, type='track'):
+        self.searches += 1
+        self.release.wait(5)
+        return super().search(q, limit, type)
+
+
+def test_concurrent_identical_searches_are_coalesced(monkeypatch, fresh_enrichment_cache):
+    fake = BlockingSearchSpotify({"danceability": 0.7, "energy": 0.6, "tempo": 101.0, "mode": 1, "duration_ms": 200000})
+    monkeypatch.setattr(spotify_auth, "get_spotify", lambda: fake)
+    shared_before = spotify_auth.search_flight.stats()["shared"]
+
+    threads, results = run_concurrently(lambda: spotify_auth.search_tracks("Trending Song", limit=3), 4)
+    wait_for(lambda: spotify_auth.search_flight.stats()["shared"] == shared_before + 3)
+    fake.release.set()
+    for thread in threads:
+        thread.join()
+
+    assert fake.searches == 1
+    assert fake.requests["audio_features"] == 1
+    assert all(result == results[0] for result in results)
+    # Each caller gets its own copy to mutate
+    assert len({id(result) for result in results}) == 4
+
+
+class StalledSpotify(CountingSpotify):
+    """audio_features blocks until released, like a Spotify outage."""
+
+    def __init__(self, features=None):
+        super().__init__(features)
+        self.release = threading.Event()
+
+    def audio_features(self, track_ids):
+        self.release.wait(5)
+        return super().audio_features(track_ids)
+
+
+def test_search_returns_partial_results_at_deadline(monkeypatch, fresh_enrichment_cache):
+    fake = StalledSpotify({"danceability": 0.7, "energy": 0.6, "tempo": 101.0, "mode": 1, "duration_ms": 200000})
+    monkeypatch.setattr(spotify_auth, "get_spotify", lambda: fake)
+    monkeypatch.setattr(spotify_auth, "search_deadline", 0.2)
+
+    started = time.monotonic()
+    tracks = spotify_auth.search_tracks("anything", limit=5)
+    elapsed = time.monotonic() - started
+    fake.release.set()
+
+    assert elapsed < 1.0
+    assert all(track["partial"] and track["genre"] == "Unknown" for track in tracks)
+    # Partial results are not cached, so the next search gets the real metadata
+    tracks = spotify_auth.search_tracks("anything", limit=5)
+    assert all("partial" not in track and track["genre"] == "indie" for track in tracks)
+
+
+def test_response_cache_persists_between_instances(tmp_path):
+    path = str(tmp_path / "spotify_cache.sqlite3")
+    ResponseCache(path).set_many("audio_features", {"id1": {"energy": 0.5}, "id2": None})
+
+    reopened = ResponseCache(path)
+    assert reopened.get_many("audio_features", ["id1", "id2", "id3"]) == {"id1": {"energy": 0.5}, "id2": None}
+    assert reopened.get("track", "id1") is MISSING
+
+
+def test_response_cache_ttls_and_size_cap(tmp_path):
+    clock = FakeClock()
+    cache = ResponseCache(str(tmp_path / "cache.sqlite3"), ttls={"artist": 10}, max_entries=3, clock=clock)
+    cache.set("artist", "a1", {"genres": ["pop"]})
+    clock.now = 11
+    assert cache.get("artist", "a1") is MISSING
+
+    for i in range(5):
+        clock.now += 1
+        cache.set("track", f"t{i}", {"id": f"t{i}"})
+    cache.trim()
+    assert cache.stats()["entries"] == 3
+    assert cache.get("track", "t0") is MISSING
+    assert cache.get("track", "t4") == {"id": "t4"}
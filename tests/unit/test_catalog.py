@@ -0,0 +1,394 @@
+# tests/unit/test_catalog.py
+
+import pandas as pd
+import pytest
+from app.utils import catalog
+from app.utils.catalog import Catalog
+from app.utils.track_feature_loader import (
+    build_track_index, get_track_features_by_id, get_track_features_by_ids
+)
+
+
+@pytest.fixture(scope="module")
+def catalog_frame():
+    return pd.DataFrame({
+        "track_id": ["id1", "id2", "id3", "id2"],
+        "track_name": ["Yellow", "Clocks", "Fix You", "Clocks (Live)"],
+        "artists": ["Coldplay", "Coldplay", "Coldplay", "Coldplay"],
+        "album_name": ["Parachutes", "A Rush of Blood", "X&Y", "Live 2003"],
+        "track_genre": ["rock", "rock", "pop", "rock"],
+        "duration_ms": [266773, 307879, 295533, 330000],
+        "danceability": [0.4291, 0.5771, 0.2091, 0.5],
+        "energy": [0.6611, 0.7491, 0.4171, 0.8],
+        "liveness": [0.234, 0.183, 0.113, 0.9],
+        "acousticness": [0.00239, 0.599, 0.164, 0.1],
+        "valence": [0.285, 0.255, 0.124, 0.3],
+        "tempo": [173.372, 130.97, 138.178, 131.0],
+        "mode": [1, 0, 1, 0],
+    })
+
+
+def test_batch_lookup_reports_missing_ids(catalog_frame):
+    index = build_track_index(catalog_frame)
+    found, missing = get_track_features_by_ids(["id3", "nope", "id1", "id3"], index=index)
+
+    assert list(found) == ["id3", "id1"]
+    assert missing == ["nope"]
+    assert found["id1"]["danceability"] == 0.429
+    assert found["id1"]["mode"] == "Major"
+
+
+def test_batch_lookup_keeps_first_duplicate_row(catalog_frame):
+    found, _ = get_track_features_by_ids(["id2"], index=build_track_index(catalog_frame))
+    assert found["id2"]["name"] == "Clocks"
+    assert found["id2"]["mode"] == "Minor"
+
+
+@pytest.fixture
+def shared_catalog(catalog_frame):
+    previous = catalog._catalog
+    shared = Catalog(catalog_frame.copy())
+    catalog.set_catalog(shared)
+    yield shared
+    catalog.set_catalog(previous)
+
+
+def test_catalog_is_shared_between_loaders(shared_catalog):
+    from app.utils import spotify_auth
+
+    assert catalog.get_catalog() is shared_catalog
+    assert get_track_features_by_id("id3")["name"] == "Fix You"
+    assert spotify_auth.enrich_metadata("id3")["genre"] == "pop"
+
+
+def test_lazy_indexes_are_built_once_under_concurrency(catalog_frame, monkeypatch):
+    import threading
+    import time
+    builds = []
+    original = catalog.TrigramIndex
+
+    def slow_index(titles):
+        builds.append(threading.get_ident())
+        time.sleep(0.05)
+        return original(titles)
+
+    monkeypatch.setattr(catalog, "TrigramIndex", slow_index)
+    shared = Catalog(catalog_frame.assign(normalized_track_name=catalog_frame["track_name"].map(catalog.normalize_str)))
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(shared.title_index)) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert len(builds) == 1
+    assert all(index is results[0] for index in results)
+
+
+def test_compiled_catalog_round_trip(catalog_frame, tmp_path):
+    from app.utils.columnar import read_columnar, write_columnar
+
+    frame = catalog_frame.assign(
+        normalized_track_name=catalog_frame["track_name"].str.casefold(),
+        album_name=["Parachutes", None, "X&Y", "Live 2003"],
+    )
+    path = tmp_path / "catalog.bin"
+    write_columnar(frame, str(path))
+    compiled = read_columnar(str(path))
+
+    assert compiled["danceability"].dtype == "float32"
+    assert list(compiled["track_name"]) == list(frame["track_name"])
+    assert pd.isna(compiled["album_name"][1])
+    assert build_track_index(compiled) == build_track_index(frame)
+
+
+def test_catalog_compile_command(tmp_path):
+    from app import create_app
+    from config import TestConfig
+
+    source = tmp_path / "spotify.csv"
+    output = tmp_path / "catalog.bin"
+    pd.DataFrame({
+        "track_id": ["a1"], "track_name": ["Song"], "artists": ["Band"],
+        "album_name": ["Album"], "track_genre": ["pop"], "duration_ms": [1000],
+        "danceability": [0.5], "energy": [0.5], "liveness": [0.5],
+        "acousticness": [0.5], "valence": [0.5], "tempo": [120.0], "mode": [1],
+    }).to_csv(source)
+
+    runner = create_app(TestConfig).test_cli_runner()
+    result = runner.invoke(args=["catalog", "compile", "--source", str(source), "--output", str(output)])
+
+    assert result.exit_code == 0, result.output
+    assert Catalog.from_compiled(str(output)).track_index["a1"][1] == "Song"
+
+
+def test_trigram_index_matches_difflib():
+    import difflib
+    from app.utils.text_index import TrigramIndex
+
+    titles = ["yellow", "fix you", "clocks", "the scientist", "viva la vida", "paradise", "hymn for the weekend"]
+    index = TrigramIndex(titles)
+    for query in ["yelow", "the scientists", "viva la vda", "paradice", "nothing alike", ""]:
+        assert index.close_matches(query, n=10, cutoff=0.7) == difflib.get_close_matches(query, titles, n=10, cutoff=0.7)
+
+
+def _legacy_metadata_by_title_artist(df, title, artist):
+    """The original pandas implementation, kept as the matching reference."""
+    import difflib
+    import re
+    from app.utils.catalog import normalize_str
+
+    normalized_title = normalize_str(title)
+    normalized_artist = normalize_str(artist)
+
+    def artist_score(csv_artists):
+        return max([
+            difflib.SequenceMatcher(None, normalized_artist, a.strip()).ratio()
+            for a in re.split(r'[;&,]', normalize_str(csv_artists))
+        ] + [0])
+
+    exact_matches = df[df['normalized_track_name'] == normalized_title].copy()
+    if not exact_matches.empty:
+        exact_matches['artist_score'] = exact_matches['normalized_artists'].apply(artist_score)
+        best_match = exact_matches.sort_values('artist_score', ascending=False).iloc[0]
+        if best_match['artist_score'] > 0.7:
+            return best_match['track_id']
+
+    possible_titles = difflib.get_close_matches(normalized_title, df['normalized_track_name'].unique(), n=10, cutoff=0.7)
+    if possible_titles:
+        candidates = df[df['normalized_track_name'].isin(possible_titles)].copy()
+        candidates['match_score'] = candidates.apply(
+            lambda row: difflib.SequenceMatcher(None, normalized_title, row['normalized_track_name']).ratio() * 0.6
+            + artist_score(row['normalized_artists']) * 0.4,
+            axis=1
+        )
+        best_match = candidates.sort_values('match_score', ascending=False).iloc[0]
+        if best_match['match_score'] > 0.7:
+            return best_match['track_id']
+
+    artist_matches = df[df['normalized_artists'].str.contains(normalized_artist, regex=False)]
+    if not artist_matches.empty:
+        return artist_matches.sort_values('popularity', ascending=False).iloc[0]['track_id']
+    return None
+
+
+REGRESSION_CORPUS = [
+    ("Yellow", "Coldplay"),
+    ("yellow", "coldplay "),
+    ("Yelow", "Coldplay"),
+    ("Clocks", "Cold Play"),
+    ("The Scientist", "Coldplay"),
+    ("Fix You", "Chris Martin"),
+    ("Viva La Vida", "Coldplay"),
+    ("Shape of You", "Ed Sheeran"),
+    ("Shape of U", "Sheeran"),
+    ("Perfect", "Beyonce"),
+    ("Unknown Song", "Sheeran"),
+    ("Nothing", "Nobody"),
+    ("Bohemian Rhapsody", "Queen"),
+    ("Bohemian Rhapsodie", "Quen"),
+    ("Under Pressure", "David Bowie"),
+    ("Under Presure", "Queen & David Bowie"),
+    ("Something", "Queen, David Bowie"),
+]
+
+
+@pytest.fixture(scope="module")
+def regression_catalog():
+    from app.utils.catalog import normalize_str
+
+    rows = [
+        ("t1", "Yellow", "Coldplay", 80),
+        ("t2", "Yellow", "Coldplay", 85),
+        ("t3", "Clocks", "Coldplay", 78),
+        ("t4", "The Scientist", "Coldplay", 79),
+        ("t5", "Fix You", "Coldplay", 82),
+        ("t6", "Viva la Vida", "Coldplay", 84),
+        ("t7", "Shape of You", "Ed Sheeran", 90),
+        ("t8", "Perfect", "Ed Sheeran", 88),
+        ("t9", "Perfect", "Ed Sheeran;Beyoncé", 70),
+        ("t10", "Bohemian Rhapsody", "Queen", 86),
+        ("t11", "Under Pressure", "Queen;David Bowie", 75),
+        ("t12", "Heroes", "David Bowie", 74),
+        ("t13", "Yellow Submarine", "The Beatles", 72),
+    ]
+    frame = pd.DataFrame(rows, columns=["track_id", "track_name", "artists", "popularity"])
+    frame["normalized_track_name"] = frame["track_name"].apply(normalize_str)
+    frame["normalized_artists"] = frame["artists"].apply(normalize_str)
+    return Catalog(frame)
+
+
+def test_title_artist_matching_matches_legacy(regression_catalog):
+    from app.utils import spotify_auth
+
+    previous = catalog._catalog
+    catalog.set_catalog(regression_catalog)
+    try:
+        for title, artist in REGRESSION_CORPUS:
+            match = spotify_auth.get_metadata_by_title_artist(title, artist)
+            expected = _legacy_metadata_by_title_artist(regression_catalog.df, title, artist)
+            assert (None if match is None else match['track_id']) == expected, (title, artist)
+    finally:
+        catalog.set_catalog(previous)
+
+
+def test_artist_index_substring_lookup(regression_catalog):
+    index = regression_catalog.artist_index
+
+    assert index.row_tokens[10] == ("queen", "david bowie")
+    assert list(index.rows_containing("bowie")) == [10, 11]
+    assert list(index.rows_containing("queen;david")) == [10]
+    assert list(index.rows_containing("queen, david")) == []
+    # Separators and padding are part of the substring, as with str.contains
+    artists = regression_catalog.df["normalized_artists"].astype(object).fillna("")
+    for query in ("bowie,", "queen &", "queen;", " bowie", ";", ""):
+        expected = list(artists[artists.str.contains(query, regex=False)].index)
+        assert list(index.rows_containing(query)) == expected, query
+    assert list(index.rows_containing("queen;")) == [10]
+    assert list(index.rows_containing("nobody")) == []
+
+
+def test_score_candidates_prefers_earliest_tie():
+    import numpy as np
+    from app.utils.spotify_auth import score_candidates
+
+    row_artists = [("coldplay",), ("coldplay", "rihanna"), ("cold play",)]
+    rows = np.array([0, 1, 2])
+
+    assert score_candidates(rows, row_artists, "coldplay") == (0, 1.0)
+    best_row, score = score_candidates(
+        rows, row_artists, "rihanna",
+        row_titles=["princess", "princess of china", "princess of china"],
+        normalized_title="princess of china"
+    )
+    assert (best_row, score) == (1, 1.0)
+
+
+@pytest.fixture
+def search_catalog_frame(catalog_frame):
+    previous = catalog._catalog
+    frame = pd.concat([catalog_frame, pd.DataFrame({
+        "track_id": ["id4", "id5"],
+        "track_name": ["Yellow Submarine", "Yellowstone"],
+        "artists": ["The Beatles", "Hozier;Coldplay"],
+        "album_name": ["Revolver", "Wasteland"],
+        "track_genre": ["rock", "folk"],
+        "duration_ms": [158000, 200000],
+        "danceability": [0.5, 0.5], "energy": [0.5, 0.5], "liveness": [0.1, 0.1],
+        "acousticness": [0.1, 0.1], "valence": [0.5, 0.5], "tempo": [110.0, 90.0],
+        "mode": [1, 1],
+    })], ignore_index=True)
+    frame["popularity"] = [70, 80, 60, 10, 90, 50]
+    frame["normalized_track_name"] = frame["track_name"].map(catalog.normalize_str)
+    frame["normalized_artists"] = frame["artists"].map(catalog.normalize_str)
+    catalog.set_catalog(Catalog(frame))
+    yield frame
+    catalog.set_catalog(previous)
+
+
+def test_catalog_search_ranks_tokens_and_prefixes(search_catalog_frame):
+    from app.utils.spotify_auth import search_catalog
+
+    # Whole-word title hits first (popularity breaks the tie), then prefix hits
+    assert [t["id"] for t in search_catalog("yellow")] == ["id4", "id1", "id5"]
+    # Every token has to match, in any field
+    assert [t["id"] for t in search_catalog("YELLOW coldpl")] == ["id1", "id5"]
+    assert [t["id"] for t in search_catalog("clocks")] == ["id2"]
+    assert [t["id"] for t in search_catalog("parachutes coldplay")] == ["id1"]
+    assert search_catalog("nothing like this") == []
+    # The last token may still be half typed, so it matches as a prefix at any length
+    assert [t["id"] for t in search_catalog("fix y")] == ["id3"]
+    assert [t["id"] for t in search_catalog("yellow p")] == ["id1"]
+    assert search_catalog("p yellow") == []
+
+    track = search_catalog("yellowstone")[0]
+    assert track["artist"] == "Hozier" and track["album"] == "Wasteland"
+    assert track["duration"] == "3:20" and track["genre"] == "folk"
+
+
+def test_search_falls_back_to_catalog_when_spotify_fails(search_catalog_frame, monkeypatch):
+    from app.utils import spotify_auth
+
+    class DownSpotify:
+        def search(self, **kwargs):
+            raise ConnectionError("Spotify is unreachable")
+
+    monkeypatch.setattr(spotify_auth, "get_spotify", lambda: DownSpotify())
+    monkeypatch.setattr(spotify_auth, "search_backend", "auto")
+    tracks = spotify_auth.search_tracks("fix you")
+    assert [t["id"] for t in tracks] == ["id3"] and tracks[0]["offline"]
+
+    monkeypatch.setattr(spotify_auth, "search_backend", "local")
+    assert [t["id"] for t in spotify_auth.search_tracks("fix you")] == ["id3"]
+
+    monkeypatch.setattr(spotify_auth, "search_backend", "spotify")
+    with pytest.raises(ConnectionError):
+        spotify_auth.search_tracks("fix you")
+
+
+def test_typeahead_completes_titles_and_artists(search_catalog_frame):
+    index = catalog.get_catalog().typeahead_index
+
+    assert index.complete("yellow") == [("Yellow Submarine", "track"), ("Yellow", "track"), ("Yellowstone", "track")]
+    assert index.complete("yellow", k=1) == [("Yellow Submarine", "track")]
+    # Individual artists are completed once each, ranked by their best track
+    assert index.complete("co") == [("Coldplay", "artist")]
+    assert index.complete("ho") == [("Hozier", "artist")]
+    assert index.complete("zz") == []
+
+
+def test_kd_tree_matches_brute_force():
+    import numpy as np
+    from app.utils.feature_index import KDTree
+
+    rng = np.random.default_rng(0)
+    points = rng.normal(size=(5000, 6)).astype(np.float32)
+    tree = KDTree(points, leaf_size=16)
+    for x in rng.normal(size=(20, 6)):
+        ids, distances = tree.query(x, k=7)
+        brute = np.sqrt(((points - x.astype(np.float32)) ** 2).sum(axis=1))
+        assert np.allclose(distances, np.sort(brute)[:7], atol=1e-5)
+        assert np.allclose(brute[ids], distances, atol=1e-5)
+
+
+def test_similar_tracks_skips_the_track_and_duplicates(search_catalog_frame):
+    space = catalog.get_catalog().feature_space
+
+    # id2 appears twice in the catalog but only once in the feature space
+    assert len(space.track_ids) == 5
+    similar = space.similar("id4", k=10)
+    assert [track_id for track_id, _ in similar][0] == "id5"
+    assert "id4" not in {track_id for track_id, _ in similar} and len(similar) == 4
+    assert space.similar("nope") is None
+
+
+def test_recommendations_skip_playlist_songs(search_catalog_frame):
+    from types import SimpleNamespace
+    from app.utils.recommender import recommend
+
+    def playlist_track(row):
+        values = search_catalog_frame.iloc[row]
+        return SimpleNamespace(title=values.track_name, artist=values.artists, **{
+            f: values[f] for f in catalog.NUMERICAL_FEATURES
+        })
+
+    # Yellow Submarine and Yellowstone share every feature but tempo
+    tracks = [playlist_track(4)]
+    ranked, profile = recommend(catalog.get_catalog(), tracks, k=2)
+
+    assert ranked[0][0] == "id5" and len(ranked) == 2
+    assert ranked[0][1] < ranked[1][1]
+    assert profile["centroid"]["tempo"] == 110.0 and profile["spread"]["tempo"] == 0.0
+
+    # A song is recognised by title and any of its credited artists
+    tracks.append(SimpleNamespace(title="yellowstone", artist="COLDPLAY", **{
+        f: None for f in catalog.NUMERICAL_FEATURES
+    }))
+    ranked, _ = recommend(catalog.get_catalog(), tracks, k=10)
+    assert {track_id for track_id, _ in ranked} == {"id1", "id2", "id3"}
+
+    # Multi-artist credits stored as one string, as seed_data does
+    tracks = [playlist_track(5)]
+    assert tracks[0].artist == "Hozier;Coldplay"
+    ranked, _ = recommend(catalog.get_catalog(), tracks, k=10)
+    assert "id5" not in {track_id for track_id, _ in ranked}
@@ -41,3 +41,9 @@ def test_duplicate_track_in_playlist(logged_in_client):
     db.session.add(pt2)
     with pytest.raises(sqlalchemy.exc.IntegrityError):
         db.session.commit()
+
+def test_duplicate_track_title_and_artist(app):
+    user = User.query.filter_by(username='alice').first()
+    db.session.add(Track(title='Track A', artist='Artist X', genre='Pop', user_id=user.id))
+    with pytest.raises(sqlalchemy.exc.IntegrityError):
+        db.session.commit()
@@ -58,3 +58,201 @@ def test_track_search_performance(logged_in_client):
 
     assert response.status_code in (200, 302, 308)
     assert elapsed < 1.0
+
+
+def _synthetic_catalog(rows):
+    import pandas as pd
+    return pd.DataFrame({
+        "track_id": [f"track{i:07d}" for i in range(rows)],
+        "track_name": [f"Song {i}" for i in range(rows)],
+        "artists": [f"Artist {i % 500}" for i in range(rows)],
+        "album_name": [f"Album {i % 1000}" for i in range(rows)],
+        "track_genre": ["pop"] * rows,
+        "duration_ms": [180000] * rows,
+        "danceability": [0.5] * rows,
+        "energy": [0.5] * rows,
+        "liveness": [0.5] * rows,
+        "acousticness": [0.5] * rows,
+        "valence": [0.5] * rows,
+        "tempo": [120.0] * rows,
+        "mode": [1] * rows,
+    })
+
+
+def test_track_id_lookup_is_constant_time():
+    from app.utils.track_feature_loader import build_track_index, get_track_features_by_id
+
+    def lookup_seconds(rows):
+        index = build_track_index(_synthetic_catalog(rows))
+        ids = [f"track{i:07d}" for i in range(0, rows, max(rows // 1000, 1))]
+        best = float("inf")
+        for _ in range(5):
+            start = time.perf_counter()
+            for track_id in ids:
+                get_track_features_by_id(track_id, index=index)
+            best = min(best, (time.perf_counter() - start) / len(ids))
+        return best
+
+    small = lookup_seconds(1_000)
+    large = lookup_seconds(100_000)
+
+    assert get_track_features_by_id("missing", index=build_track_index(_synthetic_catalog(10))) is None
+    assert large < 50e-6
+    assert large < small * 5
+
+
+def test_create_app_does_not_load_catalog():
+    import subprocess
+    import sys
+    script = (
+        "from app import create_app; create_app(); "
+        "from app.utils import catalog; print(catalog._catalog is None)"
+    )
+    result = subprocess.run([sys.executable, "-c", script], capture_output=True, text=True, timeout=60)
+    assert result.stdout.strip().splitlines()[-1] == "True"
+
+
+def test_create_app_neither_builds_spotify_client_nor_imports_spotipy():
+    import os
+    import subprocess
+    import sys
+    script = (
+        "import sys; from app import create_app; create_app(); "
+        "from app.utils import spotify_auth; "
+        "print(spotify_auth._spotify is None, 'spotipy' in sys.modules)"
+    )
+    env = {k: v for k, v in os.environ.items() if not k.startswith("SPOTIPY_")}
+    result = subprocess.run([sys.executable, "-c", script], capture_output=True, text=True, timeout=60, env=env)
+    assert result.stdout.strip().splitlines()[-1] == "True False"
+
+
+def test_fuzzy_title_lookup_latency():
+    import random
+    import string
+    from app.utils.text_index import TrigramIndex
+
+    rng = random.Random(0)
+    words = ["".join(rng.choices(string.ascii_lowercase, k=rng.randint(3, 8))) for _ in range(5000)]
+    titles = list({" ".join(rng.choices(words, k=rng.randint(1, 4))) for _ in range(100_000)})
+    index = TrigramIndex(titles)
+
+    queries = [title[:-1] + "x" for title in rng.sample(titles, 50)]
+    start = time.perf_counter()
+    for query in queries:
+        index.close_matches(query, n=10, cutoff=0.7)
+    per_lookup_ms = (time.perf_counter() - start) / len(queries) * 1000
+
+    assert per_lookup_ms < 50
+
+
+def test_similar_tracks_query_latency():
+    import numpy as np
+    from app.utils.feature_index import FeatureSpace
+
+    rng = np.random.default_rng(0)
+    features = np.column_stack([rng.random((100_000, 5)), rng.normal(120, 30, 100_000)])
+    space = FeatureSpace([f"track{i}" for i in range(100_000)], features)
+
+    queries = [f"track{i}" for i in rng.integers(0, 100_000, 200)]
+    start = time.perf_counter()
+    for track_id in queries:
+        space.similar(track_id, k=10)
+    per_query_ms = (time.perf_counter() - start) / len(queries) * 1000
+
+    assert per_query_ms < 10
+
+
+class QueryCounter:
+    """Counts SQL statements sent to the database while active."""
+
+    def __init__(self, engine):
+        self.engine = engine
+        self.statements = []
+
+    def _count(self, conn, cursor, statement, parameters, context, executemany):
+        self.statements.append(statement)
+
+    def __enter__(self):
+        from sqlalchemy import event
+        event.listen(self.engine, "before_cursor_execute", self._count)
+        return self
+
+    def __exit__(self, *exc):
+        from sqlalchemy import event
+        event.remove(self.engine, "before_cursor_execute", self._count)
+
+
+def test_create_playlist_query_count_is_independent_of_size(logged_in_client):
+    def create(name, count, existing=0):
+        tracks = [
+            {"title": f"{name} Track {i}", "artist": f"Artist {i % 7}", "genre": "Pop",
+             "valence": 0.5, "energy": 0.5, "tempo": 120, "mode": "Major", "duration_ms": 180000}
+            for i in range(count)
+        ]
+        # Reuse some tracks that already exist, and submit one twice
+        tracks += [{"title": "Track A", "artist": "Artist X"}] * min(existing, 1)
+        tracks += [tracks[0]]
+        with QueryCounter(db.engine) as counter:
+            response = logged_in_client.post('/upload/create-playlist', json={"playlist_name": name, "tracks": tracks})
+        assert response.status_code == 200
+        playlist = Playlist.query.filter_by(name=name).first()
+        assert len(playlist.tracks) == count + min(existing, 1)
+        return len(counter.statements)
+
+    assert create("Small", 5) == create("Large", 400, existing=1)
+
+
+def test_batch_track_update_query_count_is_independent_of_size(logged_in_client):
+    playlist = Playlist.query.filter_by(name='Alice Hits').first()
+
+    def batch(name, count):
+        tracks = [{"title": f"{name} Track {i}", "artist": "Batch Artist", "genre": "Pop"} for i in range(count)]
+        logged_in_client.post(f'/api/playlist/{playlist.id}/tracks:batch', json={"add": tracks})
+        existing = [pt.track_id for pt in PlaylistTrack.query.filter_by(playlist_id=playlist.id)]
+        more = [{"title": f"{name} Extra {i}", "artist": "Batch Artist", "genre": "Pop"} for i in range(count)]
+        with QueryCounter(db.engine) as counter:
+            response = logged_in_client.post(
+                f'/api/playlist/{playlist.id}/tracks:batch',
+                json={"add": more, "remove": existing}
+            )
+        assert response.status_code == 200
+        assert len(response.get_json()["removed"]) == len(existing)
+        return len(counter.statements)
+
+    assert batch("Small", 5) == batch("Large", 400)
+
+
+def test_get_playlist_query_count_is_independent_of_size(logged_in_client):
+    def load(name, count):
+        tracks = [{"title": f"{name} Track {i}", "artist": "Load Artist", "genre": "Pop"} for i in range(count)]
+        logged_in_client.post('/upload/create-playlist', json={"playlist_name": name, "tracks": tracks})
+        playlist = Playlist.query.filter_by(name=name).first()
+        db.session.expire_all()
+        with QueryCounter(db.engine) as counter:
+            response = logged_in_client.get(f'/api/playlist/{playlist.id}')
+        assert len(response.get_json()["playlist"]["tracks"]) == count
+        return len(counter.statements)
+
+    assert load("Small", 2) == load("Large", 300)
+
+
+def test_playlist_pages_cost_the_same_at_any_depth(logged_in_client):
+    tracks = [{"title": f"Deep Track {i}", "artist": "Deep Artist", "genre": "Pop"} for i in range(5000)]
+    logged_in_client.post('/upload/create-playlist', json={"playlist_name": "Deep", "tracks": tracks})
+    playlist = Playlist.query.filter_by(name="Deep").first()
+    track_ids = sorted(pt.track_id for pt in PlaylistTrack.query.filter_by(playlist_id=playlist.id))
+
+    def page(cursor=None):
+        url = f'/api/playlist/{playlist.id}?limit=50' + (f'&cursor={cursor}' if cursor else '')
+        with QueryCounter(db.engine) as counter:
+            start = time.perf_counter()
+            data = logged_in_client.get(url).get_json()
+            elapsed = time.perf_counter() - start
+        assert len(data["playlist"]["tracks"]) == 50
+        return len(counter.statements), elapsed
+
+    page()  # warm up
+    first_statements, first_elapsed = page()
+    last_statements, last_elapsed = page(track_ids[-51])
+    assert first_statements == last_statements
+    assert last_elapsed < 0.5
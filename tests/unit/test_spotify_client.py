@@ -0,0 +1,213 @@
+# tests/unit/test_spotify_client.py
+
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import pytest
+import requests
+from spotipy.exceptions import SpotifyException
+from app.utils.resilience import CircuitBreaker, CircuitOpenError
+from app.utils.spotify_client import LocalRateLimitError, SpotifyClient, TokenBucket
+
+
+class StubSpotify(BaseHTTPRequestHandler):
+    """Answers from the server's queue of (status, headers, delay) replies, then 200."""
+
+    protocol_version = "HTTP/1.1"
+
+    def do_GET(self):
+        server = self.server
+        with server.lock:
+            server.paths.append(self.path)
+            server.connections.add(self.client_address)
+            status, headers, delay = server.replies.pop(0) if server.replies else (200, {}, 0)
+        time.sleep(delay)
+        body = json.dumps({"id": self.path.rsplit("/", 1)[-1]} if status == 200 else {"error": {"message": "nope"}}).encode()
+        self.send_response(status)
+        for name, value in headers.items():
+            self.send_header(name, value)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+class FakeTime:
+    """Clock and sleep pair that records sleeps instead of waiting."""
+
+    def __init__(self):
+        self.now = 0.0
+        self.sleeps = []
+
+    def clock(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.sleeps.append(seconds)
+        self.now += seconds
+
+
+@pytest.fixture
+def stub_server():
+    server = ThreadingHTTPServer(("127.0.0.1", 0), StubSpotify)
+    server.daemon_threads = True
+    server.lock = threading.Lock()
+    server.paths, server.connections, server.replies = [], set(), []
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+@pytest.fixture
+def make_client(stub_server):
+    def make(**kwargs):
+        fake_time = FakeTime()
+        kwargs.setdefault("clock", fake_time.clock)
+        kwargs.setdefault("sleep", fake_time.sleep)
+        client = SpotifyClient(auth="token", **kwargs)
+        client.prefix = f"http://127.0.0.1:{stub_server.server_address[1]}/v1/"
+        client.sleeps = fake_time.sleeps
+        return client
+    return make
+
+
+def test_requests_reuse_pooled_connection(stub_server, make_client):
+    client = make_client()
+    for i in range(5):
+        assert client.track(f"track{i}")["id"] == f"track{i}"
+    assert len(stub_server.connections) == 1
+
+
+def test_retries_after_retry_after_header(stub_server, make_client):
+    stub_server.replies = [(429, {"Retry-After": "2"}, 0), (503, {}, 0)]
+    client = make_client(backoff_factor=0.5)
+
+    assert client.track("abc")["id"] == "abc"
+    assert len(stub_server.paths) == 3
+    # The limiter waits out Retry-After (plus one refill), then second-attempt backoff for the 503
+    assert client.sleeps[0] == 2.0 and client.sleeps[-1] == 1.0
+
+
+def test_long_retry_after_is_raised(stub_server, make_client):
+    stub_server.replies = [(429, {"Retry-After": "120"}, 0)]
+    client = make_client(max_retry_after=10)
+
+    with pytest.raises(SpotifyException) as error:
+        client.track("abc")
+    assert error.value.http_status == 429
+    assert len(stub_server.paths) == 1
+
+
+def test_client_errors_are_not_retried(stub_server, make_client):
+    stub_server.replies = [(404, {}, 0)]
+    with pytest.raises(SpotifyException):
+        make_client().track("abc")
+    assert len(stub_server.paths) == 1
+
+
+def test_read_timeout(stub_server, make_client):
+    stub_server.replies = [(200, {}, 1.0)]
+    client = make_client(timeout=(1, 0.2), max_retries=0)
+
+    started = time.monotonic()
+    with pytest.raises(requests.exceptions.Timeout):
+        client.track("slow")
+    assert time.monotonic() - started < 0.9
+
+
+def test_token_bucket_limits_rate():
+    fake_time = FakeTime()
+    bucket = TokenBucket(rate=2, capacity=2, clock=fake_time.clock, sleep=fake_time.sleep)
+    for _ in range(6):
+        assert bucket.acquire()
+    # Two from the burst, then one every half second
+    assert fake_time.now == pytest.approx(2.0)
+
+    bucket.pause(5)
+    assert not bucket.acquire(timeout=1)
+    assert bucket.acquire()
+    assert fake_time.now >= 7.0
+
+
+def test_circuit_breaker_states():
+    fake_time = FakeTime()
+    breaker = CircuitBreaker(failure_threshold=2, reset_timeout=30, clock=fake_time.clock)
+
+    breaker.record_failure()
+    assert breaker.allow() and breaker.state == "closed"
+    breaker.record_failure()
+    assert breaker.state == "open" and not breaker.allow()
+
+    fake_time.sleep(30)
+    assert breaker.state == "half_open"
+    assert breaker.allow() and not breaker.allow()  # one trial call at a time
+    breaker.record_failure()
+    assert breaker.state == "open"
+
+    fake_time.sleep(30)
+    assert breaker.allow()
+    breaker.record_success()
+    assert breaker.state == "closed"
+    assert breaker.stats()["opened"] == 2
+
+
+def test_open_circuit_stops_calling_spotify(stub_server, make_client):
+    stub_server.replies = [(503, {}, 0)] * 4
+    client = make_client(max_retries=1, breaker=CircuitBreaker(failure_threshold=2, reset_timeout=30))
+
+    for _ in range(2):
+        with pytest.raises(SpotifyException):
+            client.track("abc")
+    assert len(stub_server.paths) == 4
+
+    with pytest.raises(CircuitOpenError):
+        client.track("abc")
+    assert len(stub_server.paths) == 4
+
+    # A 404 is the service answering, so it does not count against the circuit
+    client.breaker = CircuitBreaker(failure_threshold=1)
+    stub_server.replies = [(404, {}, 0)]
+    with pytest.raises(SpotifyException):
+        client.track("abc")
+    assert client.breaker.state == "closed"
+
+
+def test_local_rate_limit_does_not_trip_circuit(stub_server, make_client):
+    fake_time = FakeTime()
+    breaker = CircuitBreaker(failure_threshold=1, reset_timeout=30, clock=fake_time.clock)
+    client = make_client(breaker=breaker, clock=fake_time.clock, sleep=fake_time.sleep)
+
+    client.limiter.pause(100)
+    for _ in range(2):
+        with pytest.raises(LocalRateLimitError):
+            client.track("abc")
+    assert stub_server.paths == []
+    assert breaker.state == "closed"
+
+    # A half-open trial throttled locally gives its slot back
+    breaker.record_failure()
+    fake_time.now += 30
+    client.limiter.pause(100)
+    with pytest.raises(LocalRateLimitError):
+        client.track("abc")
+    assert breaker.state == "half_open" and breaker.allow()
+
+
+def test_open_circuit_short_circuits_search_to_catalog(monkeypatch):
+    from app.utils import spotify_auth
+
+    breaker = CircuitBreaker(failure_threshold=1)
+    breaker.record_failure()
+    monkeypatch.setattr(spotify_auth, "spotify_breaker", breaker)
+    monkeypatch.setattr(spotify_auth, "search_backend", "auto")
+    monkeypatch.setattr(spotify_auth, "get_spotify", lambda: pytest.fail("Spotify was called"))
+    monkeypatch.setattr(spotify_auth, "search_catalog", lambda query, limit: [{"id": "local"}])
+
+    assert spotify_auth.search_tracks("anything") == [{"id": "local", "offline": True}]
+    assert spotify_auth.enrich_many([{"id": "0000notinthecatalog"}]) == [spotify_auth.generate_default_metadata()]